@@ -1,11 +1,21 @@
+import json
 from pathlib import Path
 
-from fastapi import FastAPI, File, HTTPException, Request, UploadFile, status
+from fastapi import FastAPI, File, HTTPException, Query, Request, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse, StreamingResponse
 
 from .services.indexing_service import index_pdf_file
-from .models import QAResponse, QuestionRequest
-from .services.qa_service import answer_question, stream_answer
+from .core.chunking import CHUNKING_STRATEGIES
+from .core.config import get_settings
+from .core.faq import get_faq_index
+from .core.llm import get_response_cache
+from .core.logs import configure_logging
+from .core.retrieval import get_retrieval_cache
+from .core.sessions import get_session_store
+from .models import BatchQAResult, BatchQuestionRequest, QAResponse, QuestionRequest
+from .services.faq_service import get_faq_builder
+from .services.qa_service import answer_question, answer_questions_batch, resolve_request_id, stream_answer
 
 app = FastAPI(
   title="IKMS (Information Knowledge Management System)",
@@ -17,6 +27,8 @@ app = FastAPI(
   version="0.1.0",
 )
 
+configure_logging()
+
 
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(
@@ -40,6 +52,12 @@ async def unhandled_exception_handler(
     },
   )
 
+def _retrieval_options(payload: QuestionRequest | BatchQuestionRequest) -> dict | None:
+  """Return the request's retrieval overrides as a plain dict (unset fields dropped)."""
+  if payload.retrieval is None:
+    return None
+  return payload.retrieval.model_dump(exclude_none=True)
+
 @app.post("/qa", response_model=QAResponse, status_code=status.HTTP_200_OK)
 async def qa_endpoint(payload: QuestionRequest) -> QAResponse:
   """Submit a question about the vector databases paper.
@@ -58,26 +76,107 @@ async def qa_endpoint(payload: QuestionRequest) -> QAResponse:
       detail="`question` must be a non-empty string.",
     )
 
-  result = answer_question(question)
+  # The run may wait for an identical in-flight run (e.g. a `/qa/stream` one
+  # that needs the event loop to finish), so keep it off the loop
+  result = await run_in_threadpool(
+    answer_question,
+    question,
+    retrieval_options=_retrieval_options(payload),
+    request_id=payload.request_id,
+    debug=payload.debug,
+    profile=payload.profile,
+    session_id=payload.session_id,
+  )
 
   return QAResponse(
     answer=result.get("answer", ""),
     context=result.get("context", ""),
     plan=result.get("plan"),
     sub_questions=result.get("sub_questions"),
+    request_id=result.get("thread_id"),
+    session_id=payload.session_id,
+    faq=result.get("faq"),
+    debug=result.get("debug"),
   )
 
 
+@app.post("/qa/batch", status_code=status.HTTP_200_OK)
+async def qa_batch_endpoint(payload: BatchQuestionRequest) -> StreamingResponse:
+  """Submit many questions at once and stream results back as NDJSON.
+
+  - Accept POST requests with JSON body containing a `questions` list
+  - Return 400 if the list is empty, too large, or contains blank questions
+  - Share planning and retrieval work across the batch (identical
+    sub-questions are embedded and searched only once)
+  - Stream one JSON object per line as each question finishes
+  - Returns `application/x-ndjson` content type
+  """
+
+  settings = get_settings()
+  questions = [question.strip() for question in payload.questions]
+
+  if not questions or any(not question for question in questions):
+    raise HTTPException(
+      status_code=status.HTTP_400_BAD_REQUEST,
+      detail="`questions` must be a non-empty list of non-empty strings.",
+    )
+
+  if len(questions) > settings.batch_max_questions:
+    raise HTTPException(
+      status_code=status.HTTP_400_BAD_REQUEST,
+      detail=f"`questions` may contain at most {settings.batch_max_questions} items.",
+    )
+
+  if payload.max_concurrency is not None and payload.max_concurrency < 1:
+    raise HTTPException(
+      status_code=status.HTTP_400_BAD_REQUEST,
+      detail="`max_concurrency` must be a positive integer.",
+    )
+
+  max_concurrency = min(
+    payload.max_concurrency or settings.batch_max_concurrency,
+    settings.batch_max_concurrency,
+  )
+
+  def line_generator():
+    """Serialize each finished batch result as a single NDJSON line."""
+    for result in answer_questions_batch(
+      questions,
+      max_concurrency=max_concurrency,
+      retrieval_options=_retrieval_options(payload),
+    ):
+      yield BatchQAResult(**result).model_dump_json(exclude_none=True) + "\n"
+
+  return StreamingResponse(
+    line_generator(),
+    media_type="application/x-ndjson",
+  )
+
+
+def _sse_event(event: str, data: dict) -> str:
+  """Format a single Server-Sent Event with a JSON payload.
+
+  JSON encoding escapes newlines, so every payload fits on one `data:` line
+  and cannot break SSE framing regardless of its size or content.
+  """
+  return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @app.post("/qa/stream", status_code=status.HTTP_200_OK)
 async def qa_stream_endpoint(payload: QuestionRequest) -> StreamingResponse:
   """Submit a question and stream the answer token-by-token using Server-Sent Events.
 
-  This endpoint provides the same QA functionality as `/qa` but streams the final
-  answer as it's generated by the verification agent, enabling a better user experience.
+  This endpoint provides the same QA functionality as `/qa` but streams
+  pipeline progress and the final answer as they are produced, enabling a
+  better user experience.
 
   - Accept POST requests with JSON body containing a `question` field
   - Validate the request format and return 400 for invalid requests
-  - Stream the answer using Server-Sent Events (SSE) format
+  - Stream named SSE events (`plan`, `context`, `reasoning`, `token`,
+    `done`, `error`), each with a single-line JSON `data` payload
+  - With `debug` set, a `debug` event with the timing waterfall precedes `done`
+  - `done` and `error` carry the `request_id`; re-sending the request with it
+    after an error resumes the run instead of starting over
   - Returns `text/event-stream` content type
   """
 
@@ -88,40 +187,30 @@ async def qa_stream_endpoint(payload: QuestionRequest) -> StreamingResponse:
       detail="`question` must be a non-empty string.",
     )
 
+  retrieval_options = _retrieval_options(payload)
+  request_id = resolve_request_id(
+    question, retrieval_options, payload.request_id, payload.session_id
+  )
+
   async def event_generator():
-    """Generate SSE events for streaming the answer with plan, context, and reasoning."""
+    """Generate SSE events for plan, per-sub-question context, reasoning and answer tokens."""
     try:
-      # First, run the full QA flow to get plan, context, and draft answer
-      result = answer_question(question)
-      plan = result.get("plan", "")
-      sub_questions = result.get("sub_questions", [])
-      context = result.get("context", "")
-      draft_answer = result.get("draft_answer", "")
-
-      # 1. Emit plan first - shows search strategy
-      if plan:
-        import json
-        plan_data = json.dumps({"plan": plan, "sub_questions": sub_questions})
-        yield f"data: [PLAN]{plan_data}\n\n"
-
-      # 2. Emit reasoning (draft answer) second - "Thinking"
-      if draft_answer:
-        yield f"data: [REASONING]{draft_answer}\n\n"
-
-      # 3. Emit context third
-      if context:
-        yield f"data: [CONTEXT]{context}\n\n"
-
-      # 4. Stream the final answer tokens last
-      async for token in stream_answer(question):
-        # Send each token as an SSE event
-        yield f"data: {token}\n\n"
+      async for event in stream_answer(
+        question,
+        retrieval_options=retrieval_options,
+        request_id=request_id,
+        debug=payload.debug,
+        profile=payload.profile,
+        session_id=payload.session_id,
+      ):
+        name = event.pop("event")
+        yield _sse_event(name, event)
 
       # Signal completion
-      yield "data: [DONE]\n\n"
+      yield _sse_event("done", {"request_id": request_id})
     except Exception as e:
       # Send error message and close stream
-      yield f"data: [ERROR] {str(e)}\n\n"
+      yield _sse_event("error", {"message": str(e), "request_id": request_id})
 
   return StreamingResponse(
     event_generator(),
@@ -134,16 +223,26 @@ async def qa_stream_endpoint(payload: QuestionRequest) -> StreamingResponse:
 
 
 @app.post("/index-pdf", status_code=status.HTTP_200_OK)
-async def index_pdf(file: UploadFile = File(...)) -> dict:
+async def index_pdf(
+  file: UploadFile = File(...),
+  strategy: str | None = Query(default=None, description="Chunking strategy for this upload."),
+) -> dict:
   """Upload a PDF and index it into the vector database.
 
   This endpoint:
-  - Accepts a PDF file upload
+  - Accepts a PDF file upload and an optional `strategy` query parameter
   - Saves it to the local `data/uploads/` directory
-  - Uses PyPDFLoader to load the document into LangChain `Document` objects
-  - Indexes those documents into the configured Pinecone vector store
+  - Uses PyPDFLoader to load the document page by page
+  - Chunks it with the selected strategy, keeping page spans in metadata
+  - Indexes those chunks into the configured Pinecone vector store
   """
 
+  if strategy is not None and strategy not in CHUNKING_STRATEGIES:
+    raise HTTPException(
+      status_code=status.HTTP_400_BAD_REQUEST,
+      detail=f"`strategy` must be one of: {', '.join(sorted(CHUNKING_STRATEGIES))}.",
+    )
+
   if file.content_type not in ("application/pdf",):
     raise HTTPException(
       status_code=status.HTTP_400_BAD_REQUEST,
@@ -157,10 +256,55 @@ async def index_pdf(file: UploadFile = File(...)) -> dict:
   contents = await file.read()
   file_path.write_bytes(contents)
 
-  chunks_indexed = index_pdf_file(file_path)
+  chunks_indexed = index_pdf_file(file_path, strategy)
 
   return {
     "filename": file.filename,
     "chunks_indexed": chunks_indexed,
+    "strategy": strategy or get_settings().chunking_strategy,
     "message": "PDF indexed successfully.",
-  }
\ No newline at end of file
+  }
+
+
+@app.get("/metrics/retrieval-cache", status_code=status.HTTP_200_OK)
+async def retrieval_cache_metrics() -> dict:
+  """Return hit/miss counters and size of the query-level retrieval cache."""
+
+  return get_retrieval_cache().stats()
+
+
+@app.get("/metrics/llm-cache", status_code=status.HTTP_200_OK)
+async def llm_cache_metrics() -> dict:
+  """Return hit/miss counters and size of the on-disk LLM response cache."""
+
+  cache = get_response_cache()
+  if cache is None:
+    return {"enabled": False}
+  return {"enabled": True, "mode": get_settings().llm_cache_mode, **cache.stats()}
+
+
+@app.get("/metrics/sessions", status_code=status.HTTP_200_OK)
+async def session_metrics() -> dict:
+  """Return the number of live sessions, their chunks and memory, and eviction counters."""
+
+  return get_session_store().stats()
+
+
+@app.get("/metrics/faq", status_code=status.HTTP_200_OK)
+async def faq_metrics() -> dict:
+  """Return FAQ index size and hit/miss counters, and background generation progress."""
+
+  if not get_settings().faq_enabled:
+    return {"enabled": False}
+  return {"enabled": True, **get_faq_index().stats(), "builder": get_faq_builder().stats()}
+
+
+@app.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_session(session_id: str) -> None:
+  """Forget a session's chunks and prior turns."""
+
+  if not get_session_store().delete(session_id):
+    raise HTTPException(
+      status_code=status.HTTP_404_NOT_FOUND,
+      detail=f"Unknown session `{session_id}`.",
+    )
@@ -0,0 +1 @@
+"""Offline benchmarks for indexing and retrieval."""
@@ -0,0 +1,130 @@
+"""Benchmark chunking strategies on index size, indexing time and hit rate.
+
+Each strategy chunks the same PDF and embeds the chunks with the configured
+embeddings model. Retrieval is evaluated with an exact in-memory cosine
+search (nothing is written to Pinecone) against a fixed question set, where
+a question counts as a hit if its expected phrase appears in any of the
+top-k retrieved chunks.
+
+Usage:
+  uv run python -m src.app.benchmarks.chunking data/uploads/pinecone_vector_database.pdf
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from ..core.chunking import CHUNKING_STRATEGIES, chunk_pages, load_pdf_pages
+from ..core.retrieval import get_embeddings
+
+DEFAULT_QUESTIONS = Path("data/benchmarks/chunking_questions.json")
+
+
+def _normalize(text: str) -> str:
+  return " ".join(text.split()).casefold()
+
+
+def benchmark_strategy(
+  strategy: str,
+  pages: List[Any],
+  questions: List[Dict[str, str]],
+  question_vectors: np.ndarray,
+  k: int,
+) -> Dict[str, Any]:
+  """Chunk, embed and evaluate a single strategy."""
+  embeddings = get_embeddings()
+
+  started = time.perf_counter()
+  chunks = chunk_pages(pages, strategy)
+  chunk_seconds = time.perf_counter() - started
+
+  started = time.perf_counter()
+  vectors = np.asarray(
+    embeddings.embed_documents([chunk.page_content for chunk in chunks]), dtype=np.float32
+  )
+  embed_seconds = time.perf_counter() - started
+
+  vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+  scores = question_vectors @ vectors.T
+  top_k = np.argsort(-scores, axis=1)[:, :k]
+
+  normalized_chunks = [_normalize(chunk.page_content) for chunk in chunks]
+  hits = 0
+  context_tokens = 0
+  for question, indices in zip(questions, top_k):
+    expected = _normalize(question["expected"])
+    hits += any(expected in normalized_chunks[index] for index in indices)
+    context_tokens += sum(chunks[index].metadata["tokens"] for index in indices)
+
+  text_bytes = sum(len(chunk.page_content.encode("utf-8")) for chunk in chunks)
+  metadata_bytes = sum(len(json.dumps(chunk.metadata).encode("utf-8")) for chunk in chunks)
+
+  return {
+    "strategy": strategy,
+    "chunks": len(chunks),
+    "avg_tokens": sum(chunk.metadata["tokens"] for chunk in chunks) / max(len(chunks), 1),
+    "vector_bytes": int(vectors.nbytes),
+    "index_bytes": int(vectors.nbytes) + text_bytes + metadata_bytes,
+    "chunk_seconds": chunk_seconds,
+    "embed_seconds": embed_seconds,
+    "indexing_seconds": chunk_seconds + embed_seconds,
+    "hit_rate": hits / max(len(questions), 1),
+    "avg_context_tokens": context_tokens / max(len(questions), 1),
+  }
+
+
+def run_benchmark(
+  pdf_path: Path,
+  questions_path: Path = DEFAULT_QUESTIONS,
+  strategies: List[str] | None = None,
+  k: int = 4,
+) -> List[Dict[str, Any]]:
+  """Benchmark every requested strategy on one PDF and question set."""
+  questions = json.loads(questions_path.read_text())
+  pages = load_pdf_pages(pdf_path)
+
+  question_vectors = np.asarray(
+    get_embeddings().embed_documents([item["question"] for item in questions]), dtype=np.float32
+  )
+  question_vectors /= np.clip(np.linalg.norm(question_vectors, axis=1, keepdims=True), 1e-12, None)
+
+  return [
+    benchmark_strategy(strategy, pages, questions, question_vectors, k)
+    for strategy in strategies or list(CHUNKING_STRATEGIES)
+  ]
+
+
+def _print_table(results: List[Dict[str, Any]], k: int) -> None:
+  header = f"{'strategy':<12}{'chunks':>8}{'avg tok':>9}{'index KB':>10}{'index s':>9}{f'hit@{k}':>8}{'ctx tok':>9}"
+  print(header)
+  print("-" * len(header))
+  for row in results:
+    print(
+      f"{row['strategy']:<12}{row['chunks']:>8}{row['avg_tokens']:>9.0f}"
+      f"{row['index_bytes'] / 1024:>10.1f}{row['indexing_seconds']:>9.2f}"
+      f"{row['hit_rate']:>8.0%}{row['avg_context_tokens']:>9.0f}"
+    )
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("pdf", type=Path, help="PDF file to chunk and evaluate.")
+  parser.add_argument("--questions", type=Path, default=DEFAULT_QUESTIONS)
+  parser.add_argument("--strategy", action="append", choices=sorted(CHUNKING_STRATEGIES))
+  parser.add_argument("-k", type=int, default=4, help="Chunks retrieved per question.")
+  parser.add_argument("--json", action="store_true", help="Print raw results as JSON.")
+  args = parser.parse_args()
+
+  results = run_benchmark(args.pdf, args.questions, args.strategy, args.k)
+  if args.json:
+    print(json.dumps(results, indent=2))
+  else:
+    _print_table(results, args.k)
+
+
+if __name__ == "__main__":
+  main()
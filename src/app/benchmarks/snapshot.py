@@ -0,0 +1,135 @@
+"""Export the local vector snapshot and compare it with exact search.
+
+`export` writes the vectors and metadata stored in Pinecone by
+`index_documents` to the int8 snapshot at `snapshot_path`. `evaluate`
+reports the snapshot's memory footprint, query latency and recall@k of
+the int8 scan (with and without float re-scoring) against an exact float
+search over the same vectors. Queries are the benchmark questions plus,
+optionally, randomly sampled stored vectors.
+
+Usage:
+  uv run python -m src.app.benchmarks.snapshot export
+  uv run python -m src.app.benchmarks.snapshot evaluate -k 4 --sample 200
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from ..core.config import get_settings
+from ..core.retrieval import VectorSnapshot, export_snapshot, get_embeddings
+from .chunking import DEFAULT_QUESTIONS
+
+
+def _percentile_ms(samples: List[float], percentile: float) -> float:
+  return float(np.percentile(samples, percentile) * 1000) if samples else 0.0
+
+
+def evaluate_snapshot(
+  snapshot: VectorSnapshot,
+  queries: np.ndarray,
+  k: int,
+  rescore_factor: int,
+) -> Dict[str, Any]:
+  """Measure latency and recall@k of quantized search against exact search."""
+  methods = {
+    "exact": lambda vector: VectorSnapshot._top(snapshot.exact_scores(vector), k),
+    "int8": lambda vector: snapshot.search(vector, k, rescore_k=0)[0],
+    "int8+rescore": lambda vector: snapshot.search(vector, k, rescore_k=k * rescore_factor)[0],
+  }
+
+  latencies: Dict[str, List[float]] = {name: [] for name in methods}
+  rows: Dict[str, List[np.ndarray]] = {name: [] for name in methods}
+  for vector in queries:
+    for name, search in methods.items():
+      started = time.perf_counter()
+      rows[name].append(search(vector))
+      latencies[name].append(time.perf_counter() - started)
+
+  results = []
+  for name in methods:
+    recall = [
+      len(set(found.tolist()) & set(exact.tolist())) / max(len(exact), 1)
+      for found, exact in zip(rows[name], rows["exact"])
+    ]
+    results.append({
+      "method": name,
+      "p50_ms": _percentile_ms(latencies[name], 50),
+      "p95_ms": _percentile_ms(latencies[name], 95),
+      f"recall@{k}": float(np.mean(recall)) if recall else 0.0,
+    })
+
+  return {"footprint": snapshot.footprint(), "queries": len(queries), "k": k, "methods": results}
+
+
+def _load_queries(snapshot: VectorSnapshot, questions_path: Path | None, sample: int) -> np.ndarray:
+  queries = []
+  if questions_path is not None and questions_path.exists():
+    questions = [item["question"] for item in json.loads(questions_path.read_text())]
+    queries.extend(get_embeddings().embed_documents(questions))
+  if sample and snapshot.count:
+    rows = np.random.default_rng(0).choice(snapshot.count, min(sample, snapshot.count), replace=False)
+    queries.extend(np.asarray(snapshot.vectors[np.sort(rows)]))
+  return np.asarray(queries, dtype=np.float32).reshape(-1, snapshot.dimension)
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+  footprint = report["footprint"]
+  mib = 1024 * 1024
+  print(f"vectors: {footprint['vectors']} x {footprint['dimension']}")
+  print(f"scanned per query: {footprint['scan_bytes'] / mib:.1f} MiB int8 "
+        f"(float32: {footprint['float_bytes'] / mib:.1f} MiB)")
+  print(f"records: {footprint['records_bytes'] / mib:.1f} MiB, "
+        f"on disk: {footprint['disk_bytes'] / mib:.1f} MiB")
+  print()
+
+  k = report["k"]
+  header = f"{'method':<14}{'p50 ms':>9}{'p95 ms':>9}{f'recall@{k}':>11}"
+  print(header)
+  print("-" * len(header))
+  for row in report["methods"]:
+    print(f"{row['method']:<14}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}{row[f'recall@{k}']:>11.1%}")
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--path", type=Path, default=None, help="Snapshot directory.")
+  commands = parser.add_subparsers(dest="command", required=True)
+
+  export = commands.add_parser("export", help="Export Pinecone vectors to the snapshot.")
+  export.add_argument("--namespace", default=None)
+  export.add_argument("--batch-size", type=int, default=100)
+
+  evaluate = commands.add_parser("evaluate", help="Report footprint, latency and recall.")
+  evaluate.add_argument("--questions", type=Path, default=DEFAULT_QUESTIONS)
+  evaluate.add_argument("--sample", type=int, default=100, help="Stored vectors used as extra queries.")
+  evaluate.add_argument("-k", type=int, default=4)
+  evaluate.add_argument("--rescore-factor", type=int, default=None)
+  evaluate.add_argument("--json", action="store_true", help="Print raw results as JSON.")
+  args = parser.parse_args()
+
+  settings = get_settings()
+  path = args.path or Path(settings.snapshot_path)
+
+  if args.command == "export":
+    manifest = export_snapshot(path, args.namespace, args.batch_size)
+    print(json.dumps(manifest, indent=2))
+    return
+
+  snapshot = VectorSnapshot(path)
+  queries = _load_queries(snapshot, args.questions, args.sample)
+  report = evaluate_snapshot(
+    snapshot, queries, args.k, args.rescore_factor or settings.snapshot_rescore_factor
+  )
+  if args.json:
+    print(json.dumps(report, indent=2))
+  else:
+    _print_report(report)
+
+
+if __name__ == "__main__":
+  main()
@@ -1,8 +1,9 @@
 from .prompts import PLANNING_SYSTEM_PROMPT, RETRIEVAL_SYSTEM_PROMPT, SUMMARIZATION_SYSTEM_PROMPT, VERIFICATION_SYSTEM_PROMPT
 from .tools import retrieval_tool
-from .agents import planning_agent, retrieval_agent, summarization_agent, verification_agent
+from .agents import planning_agent, retrieval_agent, summarization_agent, verification_agent, plan_question, merge_contexts
 from .state import QAState
 from .graph import run_qa_flow, stream_qa_flow
+from .checkpoint import collect_garbage, default_thread_id, get_checkpointer, get_thread_registry
 
 
-__all__ = ["PLANNING_SYSTEM_PROMPT", "RETRIEVAL_SYSTEM_PROMPT", "SUMMARIZATION_SYSTEM_PROMPT", "VERIFICATION_SYSTEM_PROMPT", "retrieval_tool", "planning_agent", "retrieval_agent", "summarization_agent", "verification_agent", "QAState", "run_qa_flow", "stream_qa_flow"]
\ No newline at end of file
+__all__ = ["PLANNING_SYSTEM_PROMPT", "RETRIEVAL_SYSTEM_PROMPT", "SUMMARIZATION_SYSTEM_PROMPT", "VERIFICATION_SYSTEM_PROMPT", "retrieval_tool", "planning_agent", "retrieval_agent", "summarization_agent", "verification_agent", "plan_question", "merge_contexts", "QAState", "run_qa_flow", "stream_qa_flow", "collect_garbage", "default_thread_id", "get_checkpointer", "get_thread_registry"]
\ No newline at end of file
@@ -5,12 +5,18 @@ Verification) and thin node functions that LangGraph uses to invoke them.
 """
 
 import json
-from typing import List
+from typing import Any, Callable, Dict, List, Tuple
 
 from langchain.agents import create_agent
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.config import get_stream_writer
 
+from ..config import get_settings
 from ..llm import create_chat_model
+from ..retrieval import RetrievalOptions, chunk_id, chunk_to_event, current_retrieval_options, normalize_query
+from ..tracing import trace_span, traced
+from .plan_parser import StreamingPlanParser
+from .speculative import start_prefetch, take_prefetch
 from .tools import retrieval_tool
 from .prompts import PLANNING_SYSTEM_PROMPT, RETRIEVAL_SYSTEM_PROMPT, SUMMARIZATION_SYSTEM_PROMPT, VERIFICATION_SYSTEM_PROMPT
 from .state import QAState
@@ -22,45 +28,84 @@ def _extract_last_ai_content(messages: List[object]) -> str:
       return str(msg.content)
   return ""
 
-# Define agents at module level for reuse
+# Define agents at module level for reuse. They are invoked from inside graph
+# nodes, so they opt out of the parent graph's checkpointer: only the QA graph's
+# node boundaries are checkpointed.
 planning_agent = create_agent(
   model=create_chat_model(),
   tools=[],
   system_prompt=PLANNING_SYSTEM_PROMPT,
+  checkpointer=False,
 )
 
 retrieval_agent = create_agent(
   model=create_chat_model(),
   tools=[retrieval_tool],
   system_prompt=RETRIEVAL_SYSTEM_PROMPT,
+  checkpointer=False,
 )
 
 summarization_agent = create_agent(
   model=create_chat_model(),
   tools=[],
   system_prompt=SUMMARIZATION_SYSTEM_PROMPT,
+  checkpointer=False,
 )
 
 verification_agent = create_agent(
   model=create_chat_model(),
   tools=[],
   system_prompt=VERIFICATION_SYSTEM_PROMPT,
+  checkpointer=False,
 )
 
-def planning_node(state: QAState) -> QAState:
-  """Planning Agent node: analyzes question and generates search plan.
-
-  This node:
-  - Sends the user's question to the Planning Agent.
-  - Agent analyzes complexity and decomposes into sub-questions.
-  - Extracts structured plan (JSON) from the response.
-  - Stores plan and sub_questions in state.
+def _with_history(content: str, history: str | None) -> str:
+  """Prefix a message with the conversation so far, if any."""
+  if not history:
+    return content
+  return f"Conversation so far:\n{history}\n\nFollow-up:\n{content}"
+
+def _run_planning_agent(content: str, on_sub_question: Callable[[str], None]) -> List[object]:
+  """Stream the Planning Agent, reporting each sub-question as soon as it is complete."""
+  parser = StreamingPlanParser()
+  messages: List[object] = []
+  for mode, chunk in planning_agent.stream(
+    {"messages": [HumanMessage(content=content)]}, stream_mode=["messages", "values"]
+  ):
+    if mode == "values":
+      messages = chunk.get("messages", [])
+    else:
+      message, _metadata = chunk
+      if isinstance(message, AIMessage) and isinstance(message.content, str):
+        for sub_question in parser.feed(message.content):
+          on_sub_question(sub_question)
+  return messages
+
+def plan_question(
+  question: str,
+  on_sub_question: Callable[[str], None] | None = None,
+  history: str | None = None,
+) -> Dict[str, Any]:
+  """Run the Planning Agent for a question and parse its JSON plan.
+
+  Args:
+    question: The user's question.
+    on_sub_question: Optional callback invoked with each sub-question as
+      soon as it appears in the planner's streamed output.
+    history: Optional prior turns of the conversation; the planner uses
+      them to turn a follow-up into self-contained sub-questions.
+
+  Returns:
+    Dictionary with `plan` and `sub_questions` keys. Falls back to the
+    original question as the single sub-question if the output is not JSON.
   """
 
-  question = state["question"]
-
-  result = planning_agent.invoke({"messages": [HumanMessage(content=question)]})
-  messages = result.get("messages", [])
+  content = _with_history(question, history)
+  if on_sub_question is None:
+    result = planning_agent.invoke({"messages": [HumanMessage(content=content)]})
+    messages = result.get("messages", [])
+  else:
+    messages = _run_planning_agent(content, on_sub_question)
 
   # Extract the last AI message content
   plan_output = _extract_last_ai_content(messages)
@@ -83,6 +128,83 @@ def planning_node(state: QAState) -> QAState:
     "sub_questions": sub_questions,
   }
 
+def merge_contexts(contexts: List[str]) -> str:
+  """Deduplicate per-query context blocks and join them into one context string."""
+  unique_contexts = list(dict.fromkeys(context for context in contexts if context))
+  return "\n\n---\n\n".join(unique_contexts)
+
+def _retrieve_for_query(query: str, options: RetrievalOptions) -> Tuple[str, list] | None:
+  """Run the Retrieval Agent for one query.
+
+  Returns:
+    The (serialized context, artifact documents) of the agent's last tool
+    call, or None if the agent did not retrieve anything.
+  """
+  with trace_span("retrieval_agent", "agent", query=query):
+    # Expose per-request retrieval options to `retrieval_tool`
+    token = current_retrieval_options.set(options)
+    try:
+      result = retrieval_agent.invoke({"messages": [HumanMessage(content=query)]})
+    finally:
+      current_retrieval_options.reset(token)
+
+  for msg in reversed(result.get("messages", [])):
+    if isinstance(msg, ToolMessage):
+      return str(msg.content), list(msg.artifact or [])
+  return None
+
+@traced("planning", "node")
+def planning_node(state: QAState) -> QAState:
+  """Planning Agent node: analyzes question and generates search plan.
+
+  This node:
+  - Sends the user's question to the Planning Agent.
+  - Agent analyzes complexity and decomposes into sub-questions.
+  - Extracts structured plan (JSON) from the response.
+  - Stores plan and sub_questions in state.
+  - Skips the agent call when `sub_questions` were already provided
+    (e.g. planned ahead of time by the batch QA service).
+
+  With `speculative_retrieval` enabled, retrieval for the original question
+  starts before the planner is called, and retrieval for each sub-question
+  starts as soon as it appears in the planner's streamed output. The work
+  is handed to the retrieval node through `prefetch_id`. Follow-ups (with
+  `history`) are not retrieved as asked, since they may only make sense
+  with the prior turns; only the planner's self-contained sub-questions are.
+  """
+
+  if state.get("sub_questions"):
+    return {
+      "plan": state.get("plan"),
+      "sub_questions": state["sub_questions"],
+    }
+
+  question = state["question"]
+  settings = get_settings()
+  history = state.get("history")
+  if not settings.speculative_retrieval or state.get("context") is not None:
+    return plan_question(question, history=history)
+
+  options = RetrievalOptions(**(state.get("retrieval_options") or {}))
+  prefetch_id, prefetch = start_prefetch(
+    lambda query: _retrieve_for_query(query, options), settings.speculative_max_workers
+  )
+  if not history:
+    prefetch.submit(question)
+  try:
+    result = plan_question(question, on_sub_question=prefetch.submit, history=history)
+  except BaseException:
+    take_prefetch(prefetch_id)
+    prefetch.close()
+    raise
+
+  # Sub-questions the streaming parser could not extract (e.g. unusual output)
+  for sub_question in result["sub_questions"] or []:
+    prefetch.submit(sub_question)
+
+  return {**result, "prefetch_id": prefetch_id}
+
+@traced("retrieval", "node")
 def retrieval_node(state: QAState) -> QAState:
   """Retrieval Agent node: gathers context from vector store.
 
@@ -92,40 +214,88 @@ def retrieval_node(state: QAState) -> QAState:
   - If no: falls back to single retrieval with original question.
   - Deduplicates chunks to avoid redundant context.
   - Stores the consolidated context string in `state["context"]`.
+  - Skips retrieval when `context` was already provided.
+
+  When the planning node started speculative retrieval, the original
+  question's results are merged with the sub-questions' results (except for
+  follow-ups with `history`), and the sub-questions that were not already
+  submitted are retrieved alongside the ones still running.
+
+  When the graph is streamed with the "custom" stream mode, a `context` event
+  is written as soon as each sub-question's retrieval completes, in
+  completion order. Chunks are sent once per request; later events reference
+  them by id in `refs`. The merged context keeps the sub-questions' order.
   """
 
+  if state.get("context") is not None:
+    return {
+      "context": state["context"],
+    }
+
   question = state["question"]
   sub_questions = state.get("sub_questions", [])
 
-  all_contexts = []
-  seen_chunks = set()  # Track unique chunks by content hash
+  retrieved_by_query: Dict[str, Tuple[str, list] | None] = {}
+  sent_chunk_ids = set()
+  write_event = get_stream_writer()
+  options = RetrievalOptions(**(state.get("retrieval_options") or {}))
 
   # Use sub-questions if available, otherwise use original question
   queries = sub_questions if sub_questions else [question]
 
+  prefetch = take_prefetch(state.get("prefetch_id"))
+  if prefetch is not None and not state.get("history"):
+    # The original question was retrieved speculatively; merge its results in
+    queries = [question, *queries]
+  unique_queries: Dict[str, str] = {}
   for query in queries:
-    result = retrieval_agent.invoke({"messages": [HumanMessage(content=query)]})
-    messages = result.get("messages", [])
+    unique_queries.setdefault(normalize_query(query), query)
+  queries = list(unique_queries.values())
 
-    # Extract context from ToolMessage
-    for msg in reversed(messages):
-      if isinstance(msg, ToolMessage):
-        chunk_content = str(msg.content)
+  if prefetch is None:
+    results = ((query, _retrieve_for_query(query, options)) for query in queries)
+  else:
+    results = prefetch.completed(queries)
 
-        # Simple deduplication by content hash
-        content_hash = hash(chunk_content)
-        if content_hash not in seen_chunks:
-          seen_chunks.add(content_hash)
-          all_contexts.append(chunk_content)
-        break
+  try:
+    for query, retrieved in results:
+      retrieved_by_query[query] = retrieved
+      if retrieved is None:
+        continue
+
+      _content, docs = retrieved
+      chunks = []
+      refs = []
+      for doc in docs:
+        doc_id = chunk_id(doc)
+        if doc_id in sent_chunk_ids:
+          refs.append(doc_id)
+        else:
+          sent_chunk_ids.add(doc_id)
+          chunks.append(chunk_to_event(doc, doc.metadata.get("score")))
+
+      write_event({
+        "event": "context",
+        "sub_question": query,
+        "chunks": chunks,
+        "refs": refs,
+      })
+  finally:
+    if prefetch is not None:
+      prefetch.close()
+
+  all_contexts = [
+    retrieved_by_query[query][0] for query in queries if retrieved_by_query.get(query) is not None
+  ]
 
   # Combine all unique contexts
-  context = "\n\n---\n\n".join(all_contexts) if all_contexts else ""
+  context = merge_contexts(all_contexts)
 
   return {
     "context": context,
   }
 
+@traced("summarization", "node")
 def summarization_node(state: QAState) -> QAState:
   """Summarization Agent node: generates draft answer from context.
 
@@ -138,7 +308,7 @@ def summarization_node(state: QAState) -> QAState:
   question = state["question"]
   context = state.get("context")
 
-  user_content = f"Question: {question}\n\nContext:\n{context}"
+  user_content = _with_history(f"Question: {question}\n\nContext:\n{context}", state.get("history"))
 
   result = summarization_agent.invoke(
     {"messages": [HumanMessage(content=user_content)]}
@@ -150,6 +320,7 @@ def summarization_node(state: QAState) -> QAState:
     "draft_answer": draft_answer,
   }
 
+@traced("verification", "node")
 def verification_node(state: QAState) -> QAState:
   """Verification Agent node: verifies and corrects the draft answer.
 
@@ -0,0 +1,212 @@
+"""Checkpointed graph execution with resume-on-failure and garbage collection.
+
+The QA graph is compiled with a local SQLite checkpointer, so every completed
+node is persisted under the request's thread id. When a run fails (e.g. an
+OpenAI timeout in the verification node) and the client retries with the same
+thread id, the graph resumes from the last completed node instead of redoing
+planning, retrieval and summarization. Completed runs are reused for a short
+window as long as the corpus has not changed, and threads idle for longer than
+the TTL are garbage collected.
+
+A thread is claimed for the duration of a run, so an identical request that
+arrives while the first is still running waits for it instead of running the
+same nodes on the same thread. A run still marked as running after
+`checkpoint_stale_run_seconds` (e.g. its process was killed) is treated as
+failed and can be resumed.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from ..config import get_settings
+from ..retrieval import current_corpus_version
+
+# Corpus versions are counted per process, so they are qualified with a
+# process token: runs completed before a restart are never reused
+_PROCESS_TOKEN = uuid.uuid4().hex[:8]
+
+_gc_lock = threading.Lock()
+_last_gc = 0.0
+
+
+def corpus_token() -> str:
+  """Identify the corpus the current process retrieves from."""
+  return f"{_PROCESS_TOKEN}:{current_corpus_version()}"
+
+
+class ThreadRegistry:
+  """Tracks when each checkpointed thread was last used and the state of its run.
+
+  Checkpoints themselves carry no queryable timestamps, so this small table
+  drives the reuse window, in-flight detection and garbage collection. A run
+  is `running` while it executes, `completed` once it finished and neither
+  if it failed.
+  """
+
+  def __init__(self, conn: sqlite3.Connection) -> None:
+    self._conn = conn
+    self._lock = threading.Lock()
+    with self._lock, self._conn:
+      self._conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS qa_threads (
+          thread_id TEXT PRIMARY KEY,
+          updated_at REAL NOT NULL,
+          completed INTEGER NOT NULL DEFAULT 0,
+          running INTEGER NOT NULL DEFAULT 0,
+          corpus TEXT
+        )
+        """
+      )
+      # Tables created before runs were claimed lack the newer columns
+      columns = {row[1] for row in self._conn.execute("PRAGMA table_info(qa_threads)")}
+      if "running" not in columns:
+        self._conn.execute("ALTER TABLE qa_threads ADD COLUMN running INTEGER NOT NULL DEFAULT 0")
+      if "corpus" not in columns:
+        self._conn.execute("ALTER TABLE qa_threads ADD COLUMN corpus TEXT")
+
+  def touch(self, thread_id: str, completed: bool) -> None:
+    """Record that the thread's run finished (or failed) and release it."""
+    with self._lock, self._conn:
+      self._conn.execute(
+        "INSERT OR REPLACE INTO qa_threads (thread_id, updated_at, completed, running, corpus) "
+        "VALUES (?, ?, ?, 0, ?)",
+        (thread_id, time.time(), int(completed), corpus_token()),
+      )
+
+  def claim(self, thread_id: str, stale_seconds: float) -> bool:
+    """Mark the thread as running unless another run holds it.
+
+    Returns:
+      False if a run started less than `stale_seconds` ago is still running.
+    """
+    now = time.time()
+    with self._lock:
+      # Claims may race across worker processes sharing the database
+      self._conn.execute("BEGIN IMMEDIATE")
+      try:
+        row = self._conn.execute(
+          "SELECT updated_at, running FROM qa_threads WHERE thread_id = ?", (thread_id,)
+        ).fetchone()
+        if row is not None and row[1] and now - row[0] < stale_seconds:
+          self._conn.commit()
+          return False
+        self._conn.execute(
+          "INSERT OR REPLACE INTO qa_threads (thread_id, updated_at, completed, running, corpus) "
+          "VALUES (?, ?, 0, 1, ?)",
+          (thread_id, now, corpus_token()),
+        )
+        self._conn.commit()
+        return True
+      except BaseException:
+        self._conn.rollback()
+        raise
+
+  def get(self, thread_id: str) -> Dict[str, Any] | None:
+    with self._lock:
+      row = self._conn.execute(
+        "SELECT updated_at, completed, running, corpus FROM qa_threads WHERE thread_id = ?",
+        (thread_id,),
+      ).fetchone()
+    if row is None:
+      return None
+    return {"updated_at": row[0], "completed": bool(row[1]), "running": bool(row[2]), "corpus": row[3]}
+
+  def expired(self, max_age_seconds: float) -> list[str]:
+    with self._lock:
+      rows = self._conn.execute(
+        "SELECT thread_id FROM qa_threads WHERE updated_at < ?",
+        (time.time() - max_age_seconds,),
+      ).fetchall()
+    return [row[0] for row in rows]
+
+  def remove(self, thread_id: str) -> None:
+    with self._lock, self._conn:
+      self._conn.execute("DELETE FROM qa_threads WHERE thread_id = ?", (thread_id,))
+
+
+def _connect() -> sqlite3.Connection:
+  path = Path(get_settings().checkpoint_path)
+  path.parent.mkdir(parents=True, exist_ok=True)
+  return sqlite3.connect(str(path), check_same_thread=False)
+
+
+@lru_cache(maxsize=1)
+def get_checkpointer() -> SqliteSaver | None:
+  """Get the SQLite checkpointer, or None when checkpointing is disabled."""
+  if not get_settings().checkpoint_enabled:
+    return None
+  return SqliteSaver(_connect())
+
+
+@lru_cache(maxsize=1)
+def get_thread_registry() -> ThreadRegistry:
+  """Get the registry of checkpointed QA threads."""
+  return ThreadRegistry(_connect())
+
+
+def default_thread_id(
+  question: str,
+  retrieval_options: Dict[str, Any] | None = None,
+  history: str | None = None,
+) -> str:
+  """Derive a thread id from the request so plain retries map to the same thread.
+
+  The conversation history is part of the id, so the same follow-up asked
+  after different prior turns is never answered from another run.
+  """
+  request = {"question": " ".join(question.split()), "retrieval_options": retrieval_options or {}}
+  if history:
+    request["history"] = history
+  payload = json.dumps(request, sort_keys=True)
+  return "qa-" + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+def is_reusable(thread_id: str) -> bool:
+  """Whether a completed run for this thread is recent enough to be reused.
+
+  Runs completed before the corpus changed (e.g. a PDF was indexed since)
+  are never reused.
+  """
+  info = get_thread_registry().get(thread_id)
+  if info is None or not info["completed"] or info["corpus"] != corpus_token():
+    return False
+  return time.time() - info["updated_at"] <= get_settings().checkpoint_reuse_seconds
+
+
+def collect_garbage() -> int:
+  """Delete checkpoints of threads idle for longer than `checkpoint_ttl_seconds`.
+
+  Returns:
+    Number of threads removed.
+  """
+  checkpointer = get_checkpointer()
+  if checkpointer is None:
+    return 0
+
+  registry = get_thread_registry()
+  expired = registry.expired(get_settings().checkpoint_ttl_seconds)
+  for thread_id in expired:
+    checkpointer.delete_thread(thread_id)
+    registry.remove(thread_id)
+  return len(expired)
+
+
+def maybe_collect_garbage() -> None:
+  """Run `collect_garbage` at most once per `checkpoint_gc_interval_seconds`."""
+  global _last_gc
+  now = time.monotonic()
+  with _gc_lock:
+    if now - _last_gc < get_settings().checkpoint_gc_interval_seconds:
+      return
+    _last_gc = now
+  collect_garbage()
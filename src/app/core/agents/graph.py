@@ -1,16 +1,24 @@
 """LangGraph orchestration for the linear multi-agent QA flow."""
 
 from functools import lru_cache
-from typing import Any, AsyncGenerator, Dict
+from typing import Any, AsyncGenerator, Dict, List
 import asyncio
+import time
 from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 
 from langgraph.constants import END, START
 from langgraph.graph import StateGraph
 
+from ..config import get_settings
+from ..tracing import profile_request, trace_event
 from .agents import planning_node, retrieval_node, summarization_node, verification_node
+from .checkpoint import default_thread_id, get_checkpointer, get_thread_registry, is_reusable, maybe_collect_garbage
 from .state import QAState
 
+# How often a request polls for an identical in-flight run to finish
+_WAIT_POLL_SECONDS = 0.2
+
 def create_qa_graph() -> Any:
   """Create and compile the linear multi-agent QA graph.
 
@@ -20,6 +28,9 @@ def create_qa_graph() -> Any:
   3. Summarization Agent: generates draft answer from context
   4. Verification Agent: verifies and corrects the answer
 
+  The graph is compiled with the SQLite checkpointer (when enabled) so each
+  completed node is persisted per thread id.
+
   Returns:
     Compiled graph ready for execution.
   """
@@ -37,14 +48,81 @@ def create_qa_graph() -> Any:
   builder.add_edge("summarization", "verification")
   builder.add_edge("verification", END)
 
-  return builder.compile()
+  return builder.compile(checkpointer=get_checkpointer())
 
 @lru_cache(maxsize=1)
 def get_qa_graph() -> Any:
   """Get the compiled QA graph instance (singleton via LRU cache)."""
   return create_qa_graph()
 
-def run_qa_flow(question: str) -> Dict[str, Any]:
+def _initial_state(
+  question: str,
+  plan: str | None = None,
+  sub_questions: List[str] | None = None,
+  context: str | None = None,
+  retrieval_options: Dict[str, Any] | None = None,
+  history: str | None = None,
+) -> QAState:
+  """Build the initial graph state for a question."""
+  return {
+    "question": question,
+    "plan": plan,
+    "sub_questions": sub_questions,
+    "context": context,
+    "draft_answer": None,
+    "answer": None,
+    "retrieval_options": retrieval_options,
+    "prefetch_id": None,
+    "history": history,
+  }
+
+def _prepare_thread(graph: Any, question: str, thread_id: str) -> tuple[Dict[str, Any], str, Any]:
+  """Decide how to run a question on a checkpointed thread.
+
+  If another run currently holds the thread (e.g. the same question asked
+  twice in a row), this blocks until that run finishes and then reuses its
+  result. Unless the action is "reuse", the thread is claimed and must be
+  released with `ThreadRegistry.touch` when the run ends.
+
+  Returns:
+    Tuple of (config, action, snapshot) where action is:
+    - "resume": a previous run failed part-way; continue from its last completed node
+    - "reuse": a previous run completed recently; its final state can be returned
+    - "fresh": start a new run
+  """
+  config = {"configurable": {"thread_id": thread_id}}
+  registry = get_thread_registry()
+  stale_seconds = get_settings().checkpoint_stale_run_seconds
+
+  waited = False
+  while True:
+    snapshot = graph.get_state(config)
+    same_question = (snapshot.values or {}).get("question") == question
+    if same_question and snapshot.values and not snapshot.next and is_reusable(thread_id):
+      return config, "reuse", snapshot
+    if registry.claim(thread_id, stale_seconds):
+      break
+    if not waited:
+      trace_event("checkpoint_wait", "checkpoint", thread_id=thread_id)
+      waited = True
+    time.sleep(_WAIT_POLL_SECONDS)
+
+  # Re-read the state now that no other run can advance it
+  snapshot = graph.get_state(config)
+  same_question = (snapshot.values or {}).get("question") == question
+  if same_question and snapshot.next:
+    return config, "resume", snapshot
+  return config, "fresh", snapshot
+
+def run_qa_flow(
+  question: str,
+  plan: str | None = None,
+  sub_questions: List[str] | None = None,
+  context: str | None = None,
+  retrieval_options: Dict[str, Any] | None = None,
+  thread_id: str | None = None,
+  history: str | None = None,
+) -> Dict[str, Any]:
   """Run the complete multi-agent QA flow for a question.
 
   This is the main entry point for the QA system. It:
@@ -52,8 +130,21 @@ def run_qa_flow(question: str) -> Dict[str, Any]:
   2. Executes the linear agent flow (Planning -> Retrieval -> Summarization -> Verification)
   3. Extracts and returns the final results
 
+  Callers that already planned or retrieved for the question (e.g. the batch
+  QA service) can pre-fill `plan`/`sub_questions` and `context`; the planning
+  and retrieval nodes then pass those values through instead of recomputing.
+
   Args:
     question: The user's question about the vector databases paper.
+    plan: Optional pre-computed search plan.
+    sub_questions: Optional pre-computed sub-questions (skips planning).
+    context: Optional pre-retrieved context (skips retrieval).
+    retrieval_options: Optional per-request retrieval overrides
+      (see `RetrievalOptions`).
+    thread_id: Checkpoint thread id. Retrying with the same id resumes a
+      failed run from its last completed node and reuses a recently
+      completed run. Defaults to an id derived from the question.
+    history: Optional prior turns of the conversation (for follow-ups).
 
   Returns:
     Dictionary with keys:
@@ -62,70 +153,162 @@ def run_qa_flow(question: str) -> Dict[str, Any]:
     - `context`: Retrieved context from vector store
     - `plan`: Search strategy generated by planning agent
     - `sub_questions`: Decomposed sub-questions for retrieval
+    - `thread_id`: Checkpoint thread id to retry with (when checkpointing is on)
   """
 
   graph = get_qa_graph()
 
-  initial_state = {
-    "question": question,
-    "plan": None,
-    "sub_questions": None,
-    "context": None,
-    "draft_answer": None,
-    "answer": None,
-  }
+  initial_state = _initial_state(
+    question,
+    plan=plan,
+    sub_questions=sub_questions,
+    context=context,
+    retrieval_options=retrieval_options,
+    history=history,
+  )
+
+  if get_checkpointer() is None:
+    return graph.invoke(initial_state)
 
-  final_state = graph.invoke(initial_state)
+  maybe_collect_garbage()
+  thread_id = thread_id or default_thread_id(question, retrieval_options, history)
+  config, action, snapshot = _prepare_thread(graph, question, thread_id)
+  trace_event("checkpoint", "checkpoint", action=action, thread_id=thread_id)
+  if action == "reuse":
+    return {**snapshot.values, "thread_id": thread_id}
 
-  return final_state
+  registry = get_thread_registry()
+  try:
+    final_state = graph.invoke(None if action == "resume" else initial_state, config)
+  except BaseException:
+    registry.touch(thread_id, completed=False)
+    raise
+  registry.touch(thread_id, completed=True)
 
-async def stream_qa_flow(question: str) -> AsyncGenerator[str, None]:
-  """Stream the multi-agent QA flow for a question, yielding tokens as they're generated.
+  return {**final_state, "thread_id": thread_id}
 
-  This async generator streams tokens from the verification agent (final answer) as they
-  are generated by the LLM. It filters out tokens from other nodes (retrieval, summarization)
-  to only return the final answer to the user.
+async def stream_qa_flow(
+  question: str,
+  retrieval_options: Dict[str, Any] | None = None,
+  thread_id: str | None = None,
+  profile: bool = False,
+  history: str | None = None,
+) -> AsyncGenerator[Dict[str, Any], None]:
+  """Stream the multi-agent QA flow for a question, yielding events as they happen.
+
+  The graph runs once and emits events incrementally:
+  - `plan`: the planning agent's plan and sub-questions
+  - `context`: one event per sub-question as soon as its retrieval completes,
+    with new chunks (id, page, score, text) and `refs` to chunks already sent
+  - `reasoning`: the summarization agent's draft answer
+  - `token`: tokens from the verification agent (final answer) as they are generated
+
+  With checkpointing enabled, a retry on the same thread resumes a failed run
+  (re-emitting the plan and draft answer already produced) or replays a
+  recently completed run's plan, draft and answer without running the graph.
 
   Note: Due to LangGraph's streaming behavior, we use the sync .stream() method
   in a thread pool executor to enable async streaming for FastAPI.
 
   Args:
     question: The user's question about the vector databases paper.
+    retrieval_options: Optional per-request retrieval overrides.
+    thread_id: Checkpoint thread id (defaults to an id derived from the question).
+    profile: Record a sampling profile of the graph run (see `profile_request`).
+    history: Optional prior turns of the conversation (for follow-ups).
 
   Yields:
-    String tokens from the verification agent's LLM output.
+    Event dictionaries with an `event` key naming the event type.
   """
 
-
   graph = get_qa_graph()
 
-  initial_state = {
-    "question": question,
-    "plan": None,
-    "sub_questions": None,
-    "context": None,
-    "draft_answer": None,
-    "answer": None,
-  }
+  initial_state = _initial_state(question, retrieval_options=retrieval_options, history=history)
+  inputs = initial_state
+  config = None
+  action = "fresh"
+  snapshot = None
+
+  if get_checkpointer() is not None:
+    maybe_collect_garbage()
+    thread_id = thread_id or default_thread_id(question, retrieval_options, history)
+    # May wait for an identical in-flight run, so keep it off the event loop
+    config, action, snapshot = await asyncio.to_thread(_prepare_thread, graph, question, thread_id)
+    trace_event("checkpoint", "checkpoint", action=action, thread_id=thread_id)
+    if action == "resume":
+      inputs = None
+
+  def _saved_events():
+    """Events for stages already completed on a resumed or reused thread."""
+    values = snapshot.values
+    if values.get("plan") is not None:
+      yield {"event": "plan", "plan": values["plan"], "sub_questions": values.get("sub_questions")}
+    if values.get("draft_answer") is not None:
+      yield {"event": "reasoning", "draft_answer": values["draft_answer"]}
+    if action == "reuse" and values.get("answer"):
+      yield {"event": "token", "content": values["answer"]}
+
+  def _graph_events():
+    """Events of the graph run itself."""
+    for mode, chunk in graph.stream(
+      inputs, config, stream_mode=["updates", "custom", "messages"]
+    ):
+      if mode == "custom":
+        yield chunk
+      elif mode == "updates":
+        if "planning" in chunk:
+          update = chunk["planning"]
+          yield {
+            "event": "plan",
+            "plan": update.get("plan"),
+            "sub_questions": update.get("sub_questions"),
+          }
+        elif "summarization" in chunk:
+          yield {
+            "event": "reasoning",
+            "draft_answer": chunk["summarization"].get("draft_answer"),
+          }
+      elif mode == "messages":
+        msg, metadata = chunk
+        # Only yield tokens from the verification node (final answer)
+        if metadata.get("langgraph_node") == "verification" and msg.content:
+          yield {"event": "token", "content": msg.content}
 
   # Use ThreadPoolExecutor to run sync stream() in a thread
   # LangGraph's sync stream() properly streams tokens, but astream() doesn't for our use case
   def _sync_stream():
-    for msg, metadata in graph.stream(initial_state, stream_mode="messages"):
-      # Only yield tokens from the verification node (final answer)
-      if metadata.get("langgraph_node") == "verification" and msg.content:
-        yield msg.content
+    if action != "fresh":
+      yield from _saved_events()
+    if action == "reuse":
+      return
+
+    completed = False
+    try:
+      yield from _graph_events()
+      completed = True
+    finally:
+      # Also releases the thread when the client disconnects mid-stream
+      if config is not None:
+        get_thread_registry().touch(thread_id, completed=completed)
+
+  def _profiled(events):
+    """Profile the graph run in the thread that executes it."""
+    with profile_request(thread_id or "qa-stream", profile):
+      yield from events
 
-  # Convert sync generator to async
+  # Convert sync generator to async. Every step runs in the same worker thread
+  # (so a profiler started there samples the whole run) and in a copy of the
+  # caller's context (so the request trace and options follow the graph).
   loop = asyncio.get_event_loop()
+  context = copy_context()
   with ThreadPoolExecutor(max_workers=1) as executor:
-    iterator = _sync_stream()
+    iterator = _profiled(_sync_stream())
     while True:
       try:
         # Run next() in thread pool to avoid blocking
-        token = await loop.run_in_executor(executor, next, iterator, StopIteration)
-        if token is StopIteration:
+        event = await loop.run_in_executor(executor, context.run, next, iterator, StopIteration)
+        if event is StopIteration:
           break
-        yield token
+        yield event
       except StopIteration:
-        break
\ No newline at end of file
+        break
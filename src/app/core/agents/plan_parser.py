@@ -0,0 +1,108 @@
+"""Incremental parsing of the Planning Agent's streamed JSON output."""
+
+import json
+from json.decoder import scanstring
+from typing import List
+
+_WHITESPACE = " \t\r\n"
+
+
+class _Incomplete(Exception):
+  """More output is needed before the next token can be parsed."""
+
+
+class StreamingPlanParser:
+  """Extract `sub_questions` items from a partial planner response.
+
+  The planner answers with `{"plan": "...", "sub_questions": ["...", ...]}`.
+  Feeding the streamed text piece by piece returns each sub-question as soon
+  as its closing quote arrives, so work for it can start before the planner
+  has finished. Only the top-level object is scanned, so a `sub_questions`
+  mention inside the plan text is never mistaken for the key. Text before
+  the opening brace (e.g. a Markdown code fence) is skipped. Output that
+  does not follow the format simply yields nothing; the caller still parses
+  the complete response as before.
+  """
+
+  def __init__(self) -> None:
+    self._buffer = ""
+    self._pos = 0
+    self._state = "start"  # start | key | colon | value | array | done
+    self._key: str | None = None
+
+  def _skip_whitespace(self) -> None:
+    while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+      self._pos += 1
+
+  def _peek(self) -> str:
+    self._skip_whitespace()
+    if self._pos >= len(self._buffer):
+      raise _Incomplete
+    return self._buffer[self._pos]
+
+  def _string(self) -> str:
+    """Parse a JSON string starting at the current position."""
+    try:
+      value, end = scanstring(self._buffer, self._pos + 1)
+    except json.JSONDecodeError:
+      raise _Incomplete
+    self._pos = end
+    return value
+
+  def feed(self, text: str) -> List[str]:
+    """Add streamed text and return the sub-questions completed by it."""
+    self._buffer += text
+    found: List[str] = []
+    try:
+      while self._state != "done":
+        if self._state == "start":
+          brace = self._buffer.find("{", self._pos)
+          if brace < 0:
+            self._pos = len(self._buffer)
+            raise _Incomplete
+          self._pos = brace + 1
+          self._state = "key"
+
+        elif self._state == "key":
+          char = self._peek()
+          if char == ",":
+            self._pos += 1
+          elif char == "}":
+            self._state = "done"
+          elif char == '"':
+            self._key = self._string()
+            self._state = "colon"
+          else:
+            self._state = "done"
+
+        elif self._state == "colon":
+          if self._peek() != ":":
+            self._state = "done"
+            continue
+          self._pos += 1
+          self._state = "value"
+
+        elif self._state == "value":
+          char = self._peek()
+          if self._key == "sub_questions" and char == "[":
+            self._pos += 1
+            self._state = "array"
+          elif char == '"':
+            self._string()
+            self._state = "key"
+          else:
+            # Values other than strings are not expected; stop parsing early
+            self._state = "done"
+
+        elif self._state == "array":
+          char = self._peek()
+          if char == ",":
+            self._pos += 1
+          elif char == '"':
+            found.append(self._string())
+          else:
+            # End of the array (or an unexpected token): nothing more to extract
+            self._state = "done"
+    except _Incomplete:
+      pass
+    return found
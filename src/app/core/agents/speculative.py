@@ -0,0 +1,83 @@
+"""Speculative retrieval started while the Planning Agent is still running.
+
+The planning node submits retrieval for the original question immediately
+and for each sub-question as soon as the streamed plan contains it. The
+running work is kept in a process-local registry under a `prefetch_id`
+that travels through the graph state, and the retrieval node collects the
+results from there. The futures themselves never enter the (checkpointed)
+state: if the registry entry is gone, e.g. after a restart, the retrieval
+node simply retrieves everything itself.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+from typing import Any, Callable, Dict, Iterator, List
+
+from ..retrieval import normalize_query
+
+# Entries not collected within this time (e.g. the run failed after planning)
+# are discarded the next time a prefetch starts
+_STALE_SECONDS = 300.0
+
+_lock = threading.Lock()
+_prefetches: Dict[str, "RetrievalPrefetch"] = {}
+
+
+class RetrievalPrefetch:
+  """Retrievals running in the background for one graph run."""
+
+  def __init__(self, retrieve_fn: Callable[[str], Any], max_workers: int) -> None:
+    self._retrieve_fn = retrieve_fn
+    self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    self._futures: Dict[str, Future] = {}
+    self._lock = threading.Lock()
+    self.created = time.monotonic()
+
+  def submit(self, query: str) -> None:
+    """Start retrieval for `query` unless an equivalent query was submitted."""
+    key = normalize_query(query)
+    with self._lock:
+      if key in self._futures:
+        return
+      # Copy the context so the request trace follows the work into the pool
+      self._futures[key] = self._executor.submit(copy_context().run, self._retrieve_fn, query)
+
+  def completed(self, queries: List[str]) -> Iterator[tuple[str, Any]]:
+    """Yield (query, result) for each query as soon as its retrieval finishes.
+
+    Queries that were not submitted yet are submitted first, so they run
+    alongside the ones already in flight.
+    """
+    for query in queries:
+      self.submit(query)
+    with self._lock:
+      futures = {self._futures[normalize_query(query)]: query for query in queries}
+    for future in as_completed(futures):
+      yield futures[future], future.result()
+
+  def close(self) -> None:
+    self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def start_prefetch(retrieve_fn: Callable[[str], Any], max_workers: int) -> tuple[str, RetrievalPrefetch]:
+  """Register a new prefetch and return its id."""
+  now = time.monotonic()
+  prefetch = RetrievalPrefetch(retrieve_fn, max_workers)
+  prefetch_id = uuid.uuid4().hex
+  with _lock:
+    stale = [key for key, entry in _prefetches.items() if now - entry.created > _STALE_SECONDS]
+    for key in stale:
+      _prefetches.pop(key).close()
+    _prefetches[prefetch_id] = prefetch
+  return prefetch_id, prefetch
+
+
+def take_prefetch(prefetch_id: str | None) -> RetrievalPrefetch | None:
+  """Remove and return a registered prefetch, or None if it is unknown."""
+  if not prefetch_id:
+    return None
+  with _lock:
+    return _prefetches.pop(prefetch_id, None)
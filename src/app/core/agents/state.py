@@ -11,6 +11,11 @@ class QAState(TypedDict):
     2. Retrieval Agent: populates `context` from `question` and `sub_questions`
     3. Summarization Agent: generates `draft_answer` from `question` + `context`
     4. Verification Agent: produces final `answer` from `question` + `context` + `draft_answer`
+
+    `retrieval_options` carries optional per-request overrides for retrieval
+    (k, MMR and adaptive depth settings) as a plain dict. `prefetch_id`
+    refers to retrievals the planning node started speculatively. `history`
+    holds the session's recent turns, so follow-up questions can be resolved.
   """
 
   question: str
@@ -18,4 +23,7 @@ class QAState(TypedDict):
   sub_questions: list[str] | None
   context: str | None
   draft_answer: str | None
-  answer: str | None
\ No newline at end of file
+  answer: str | None
+  retrieval_options: dict | None
+  prefetch_id: str | None
+  history: str | None
\ No newline at end of file
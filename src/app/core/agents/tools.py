@@ -1,17 +1,20 @@
 """Tools available to agents in the multi-agent RAG system."""
 
+from langchain_core.documents import Document
 from langchain_core.tools import tool
 
-from ..retrieval import retrieve, serialize_chunks
+from ..retrieval import RetrievalOptions, current_retrieval_options, retrieve, serialize_chunks
+from ..tracing import trace_span
 
 
 @tool(response_format="content_and_artifact")
 def retrieval_tool(query: str):
   """Search the vector database for relevant document chunks.
 
-  This tool retrieves the top 4 most relevant chunks from the Pinecone
-  vector store based on the query. The chunks are formatted with page
-  numbers and indices for easy reference.
+  This tool over-fetches candidates from the Pinecone vector store and
+  re-ranks them with MMR to return a diverse set of relevant chunks (sizes
+  come from the request's retrieval options, falling back to settings). The
+  chunks are formatted with page numbers and indices for easy reference.
 
   Args:
     query: The search query string to find relevant document chunks.
@@ -20,11 +23,20 @@ def retrieval_tool(query: str):
     Tuple of (serialized_content, artifact) where:
     - serialized_content: A formatted string containing the retrieved chunks
       with metadata. Format: "Chunk 1 (page=X): ...\n\nChunk 2 (page=Y): ..."
-    - artifact: List of Document objects with full metadata for reference
+    - artifact: List of Document objects with full metadata for reference,
+      including the similarity score under `metadata["score"]`
   """
 
    # Retrieve documents from vector store
-  docs = retrieve(query, k=4)
+  options = current_retrieval_options.get() or RetrievalOptions()
+  with trace_span("retrieval_tool", "tool", query=query):
+    results = retrieve(query, options=options)
+
+  # Attach scores to copies so cached/shared documents are never mutated
+  docs = [
+    Document(id=doc.id, page_content=doc.page_content, metadata={**doc.metadata, "score": score})
+    for doc, score in results
+  ]
 
   # Serialize chunks into formatted string (content)
   context = serialize_chunks(docs)
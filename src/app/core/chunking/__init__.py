@@ -0,0 +1,6 @@
+"""Chunking subsystem: page-aware, token-sized PDF chunking strategies."""
+
+from .pages import PagedText, load_pdf_pages
+from .strategies import CHUNKING_STRATEGIES, chunk_pages, chunk_pdf, count_tokens
+
+__all__ = ["PagedText", "load_pdf_pages", "CHUNKING_STRATEGIES", "chunk_pages", "chunk_pdf", "count_tokens"]
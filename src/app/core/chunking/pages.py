@@ -0,0 +1,47 @@
+"""Page-aware PDF loading for the chunking subsystem."""
+
+from bisect import bisect_right
+from pathlib import Path
+from typing import List, Tuple
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
+
+# Separator inserted between pages; a blank line doubles as a paragraph break
+PAGE_SEPARATOR = "\n\n"
+
+
+def load_pdf_pages(file_path: Path) -> List[Document]:
+  """Load a PDF as one Document per page, keeping per-page metadata."""
+  loader = PyPDFLoader(str(file_path), mode="page")
+  return loader.load()
+
+
+class PagedText:
+  """The text of all pages joined together, with offset-to-page lookup.
+
+  Chunkers split the joined text so chunks may cross page boundaries; the
+  character offsets of each chunk are then mapped back to a page span.
+  """
+
+  def __init__(self, pages: List[Document]) -> None:
+    self.page_starts: List[int] = []
+    self.page_numbers: List[int] = []
+
+    position = 0
+    for index, page in enumerate(pages):
+      self.page_starts.append(position)
+      # PyPDFLoader pages are 0-based; expose 1-based page numbers
+      self.page_numbers.append(int(page.metadata.get("page", index)) + 1)
+      position += len(page.page_content) + len(PAGE_SEPARATOR)
+
+    self.text = PAGE_SEPARATOR.join(page.page_content for page in pages)
+
+  def page_at(self, offset: int) -> int:
+    """Return the 1-based page number containing a character offset."""
+    index = bisect_right(self.page_starts, offset) - 1
+    return self.page_numbers[max(index, 0)]
+
+  def page_span(self, start: int, end: int) -> Tuple[int, int]:
+    """Return the first and last page covered by the text in `[start, end)`."""
+    return self.page_at(start), self.page_at(max(start, end - 1))
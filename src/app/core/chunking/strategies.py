@@ -0,0 +1,285 @@
+"""Chunking strategies for indexing PDFs.
+
+Every strategy splits the page-joined text of a document into character
+spans, so each chunk can be mapped back to the pages it covers:
+
+- `characters`: the original fixed 500-character splitter (kept for comparison)
+- `tokens`: recursive splitting sized in model tokens
+- `structure`: packs whole paragraphs under their heading up to a token
+  budget, starting a new chunk at each heading
+"""
+
+import re
+import statistics
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import tiktoken
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from ..config import get_settings
+from .pages import PagedText, load_pdf_pages
+
+_ENCODING_NAME = "cl100k_base"
+
+_BULLET_RE = re.compile(r"^\s*([•\uf0b7▪–*-]|\d+[.)])\s+")
+_HEADING_RE = re.compile(r"^(#{1,6}\s+\S|\d+(\.\d+)*\.?\s+[A-Z])")
+_SENTENCE_END = (".", "!", "?", ":")
+
+
+@dataclass
+class _Span:
+  """A chunk as a character range of the page-joined text."""
+
+  start: int
+  end: int
+  section: str | None = None
+
+
+@dataclass
+class _Block:
+  """A heading or paragraph as a character range of the page-joined text."""
+
+  start: int
+  end: int
+  is_heading: bool
+
+
+@lru_cache(maxsize=1)
+def _get_encoding() -> tiktoken.Encoding:
+  return tiktoken.get_encoding(_ENCODING_NAME)
+
+
+def count_tokens(text: str) -> int:
+  """Count model tokens in `text` using the embeddings model's encoding."""
+  return len(_get_encoding().encode(text, disallowed_special=()))
+
+
+def _split_with(
+  splitter: RecursiveCharacterTextSplitter,
+  text: str,
+  offset: int = 0,
+  section: str | None = None,
+) -> List[_Span]:
+  """Split `text` with a LangChain splitter, returning spans offset into the full text."""
+  spans = []
+  for doc in splitter.create_documents([text]):
+    start = offset + max(doc.metadata.get("start_index", 0), 0)
+    spans.append(_Span(start, start + len(doc.page_content), section))
+  return spans
+
+
+def _token_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+  return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+    encoding_name=_ENCODING_NAME,
+    chunk_size=chunk_size,
+    chunk_overlap=chunk_overlap,
+    add_start_index=True,
+  )
+
+
+def _character_spans(text: str, chunk_size: int, chunk_overlap: int) -> List[_Span]:
+  """Legacy strategy: fixed 500-character chunks with 50 characters of overlap."""
+  splitter = RecursiveCharacterTextSplitter(
+    chunk_size=500, chunk_overlap=50, add_start_index=True
+  )
+  return _split_with(splitter, text)
+
+
+def _token_spans(text: str, chunk_size: int, chunk_overlap: int) -> List[_Span]:
+  """Recursive paragraph/sentence/word splitting sized in tokens."""
+  return _split_with(_token_splitter(chunk_size, chunk_overlap), text)
+
+
+def _is_heading(line: str, previous: str | None, following: str | None) -> bool:
+  """Heuristically decide whether a PDF text line is a section heading.
+
+  Headings are short lines that do not end a sentence, follow a finished
+  sentence (or a blank line) and are followed by a new sentence.
+  """
+  stripped = line.strip()
+  if not stripped or len(stripped) > 80:
+    return False
+  if _BULLET_RE.match(stripped) and not _HEADING_RE.match(stripped):
+    return False
+  if stripped.startswith("#"):
+    return True
+
+  words = stripped.split()
+  if len(words) > 10 or not stripped[0].isupper() or stripped[-1] in ".,;:!":
+    return False
+
+  previous_done = previous is None or not previous.strip() or previous.rstrip().endswith(_SENTENCE_END)
+  following_new = following is None or not following.strip() or following.lstrip()[:1].isupper() or bool(_BULLET_RE.match(following))
+  return previous_done and following_new
+
+
+def _blocks(text: str) -> List[_Block]:
+  """Split text into heading and paragraph blocks with their offsets.
+
+  PDF text extraction keeps line breaks but rarely blank lines, so a
+  paragraph also ends at a bullet or at a noticeably short line that ends
+  a sentence.
+  """
+  lines = []
+  position = 0
+  for line in text.split("\n"):
+    lines.append((position, line))
+    position += len(line) + 1
+
+  lengths = [len(line.rstrip()) for _, line in lines if line.strip()]
+  full_width = statistics.quantiles(lengths, n=10)[-1] if len(lengths) >= 2 else 0
+
+  blocks: List[_Block] = []
+  paragraph_start: int | None = None
+  paragraph_end = 0
+
+  def _close_paragraph() -> None:
+    nonlocal paragraph_start
+    if paragraph_start is not None:
+      blocks.append(_Block(paragraph_start, paragraph_end, False))
+      paragraph_start = None
+
+  for index, (start, line) in enumerate(lines):
+    stripped = line.rstrip()
+    if not stripped.strip():
+      _close_paragraph()
+      continue
+
+    previous = lines[index - 1][1] if index > 0 else None
+    following = lines[index + 1][1] if index + 1 < len(lines) else None
+    if _is_heading(line, previous, following):
+      _close_paragraph()
+      blocks.append(_Block(start, start + len(stripped), True))
+      continue
+
+    if _BULLET_RE.match(line):
+      _close_paragraph()
+
+    if paragraph_start is None:
+      paragraph_start = start
+    paragraph_end = start + len(stripped)
+
+    if stripped.endswith(_SENTENCE_END) and len(stripped) < 0.75 * full_width:
+      _close_paragraph()
+
+  _close_paragraph()
+  return blocks
+
+
+def _structure_spans(text: str, chunk_size: int, chunk_overlap: int) -> List[_Span]:
+  """Pack paragraphs under their heading into chunks of up to `chunk_size` tokens.
+
+  A heading starts a new chunk unless the current one is still very small.
+  Paragraphs larger than the budget fall back to token splitting with
+  `chunk_overlap`; otherwise chunks end on paragraph boundaries and need no
+  overlap.
+  """
+  spans: List[_Span] = []
+  section: str | None = None
+  current: _Span | None = None
+  current_tokens = 0
+
+  def _flush() -> None:
+    nonlocal current, current_tokens
+    if current is not None:
+      spans.append(current)
+    current = None
+    current_tokens = 0
+
+  for block in _blocks(text):
+    block_text = text[block.start:block.end]
+    block_tokens = count_tokens(block_text)
+
+    if block.is_heading:
+      if current_tokens >= chunk_size // 4:
+        _flush()
+      section = block_text.strip().lstrip("#").strip()
+
+    if block_tokens > chunk_size:
+      _flush()
+      spans.extend(
+        _split_with(_token_splitter(chunk_size, chunk_overlap), block_text, block.start, section)
+      )
+      continue
+
+    if current is not None and current_tokens + block_tokens > chunk_size:
+      _flush()
+
+    if current is None:
+      current = _Span(block.start, block.end, section)
+    current.end = block.end
+    current_tokens += block_tokens
+
+  _flush()
+  return spans
+
+
+CHUNKING_STRATEGIES: Dict[str, Callable[[str, int, int], List[_Span]]] = {
+  "characters": _character_spans,
+  "tokens": _token_spans,
+  "structure": _structure_spans,
+}
+
+
+def chunk_pages(pages: List[Document], strategy: str | None = None) -> List[Document]:
+  """Chunk page Documents with the given strategy, keeping page spans.
+
+  Args:
+    pages: One Document per PDF page (as produced by `load_pdf_pages`).
+    strategy: Name of a strategy in `CHUNKING_STRATEGIES` (defaults to
+      `chunking_strategy` from settings).
+
+  Returns:
+    Chunk Documents whose metadata records `source`, the 1-based `page` and
+    `page_end` span, the character `start_index`, the `chunk_strategy`,
+    the token count and, for structure-aware chunks, the `section` heading.
+
+  Raises:
+    ValueError: If the strategy is unknown.
+  """
+  settings = get_settings()
+  strategy = strategy or settings.chunking_strategy
+  if strategy not in CHUNKING_STRATEGIES:
+    raise ValueError(
+      f"Unknown chunking strategy {strategy!r}; expected one of {sorted(CHUNKING_STRATEGIES)}."
+    )
+
+  if not pages:
+    return []
+
+  paged = PagedText(pages)
+  source = pages[0].metadata.get("source", "")
+  spans = CHUNKING_STRATEGIES[strategy](
+    paged.text, settings.chunk_size_tokens, settings.chunk_overlap_tokens
+  )
+
+  chunks = []
+  for span in spans:
+    content = paged.text[span.start:span.end].strip()
+    if not content:
+      continue
+
+    page, page_end = paged.page_span(span.start, span.end)
+    # Pinecone metadata values cannot be null, so optional keys are omitted
+    metadata = {
+      "source": source,
+      "page": page,
+      "page_end": page_end,
+      "start_index": span.start,
+      "chunk_strategy": strategy,
+      "tokens": count_tokens(content),
+    }
+    if span.section:
+      metadata["section"] = span.section
+    chunks.append(Document(page_content=content, metadata=metadata))
+
+  return chunks
+
+
+def chunk_pdf(file_path: Path, strategy: str | None = None) -> List[Document]:
+  """Load a PDF page by page and chunk it with the given strategy."""
+  return chunk_pages(load_pdf_pages(file_path), strategy)
@@ -4,6 +4,8 @@ This module uses Pydantic Settings to load and validate environment variables
 for OpenAI models, Pinecone settings, and other system parameters.
 """
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -14,12 +16,72 @@ class Settings(BaseSettings):
   openai_model_name: str = "gpt-4o-mini"
   openai_embeddings_model_name: str = "text-embedding-3-small"
 
+  # Logging Configuration
+  log_level: str = "INFO"  # level of the app's own loggers (e.g. adaptive retrieval decisions)
+
+  # LLM Response Cache Configuration
+  llm_cache_mode: Literal["off", "read_write", "record", "replay"] = "read_write"
+  llm_cache_path: str = "data/cache/llm_cache.sqlite"
+  llm_cache_max_entries: int = 10000
+
   # Pinecone Configuration
   pinecone_api_key: str
   pinecone_index_name: str
 
   # Retrieval Configuration
   retrieval_k: int = 4
+  retrieval_fetch_k: int = 20  # candidates over-fetched for MMR re-ranking
+  retrieval_mmr_lambda: float = 0.5  # 1.0 = pure relevance, 0.0 = max diversity
+  retrieval_adaptive: bool = False  # choose k per query from similarity scores
+  retrieval_min_k: int = 2
+  retrieval_max_k: int = 8
+  retrieval_score_threshold: float | None = 0.3
+  retrieval_score_gap: float | None = 0.1
+  retrieval_cache_max_entries: int = 1024  # 0 disables the cache
+  retrieval_cache_ttl_seconds: float = 900.0
+  speculative_retrieval: bool = True  # retrieve while the planner is still running
+  speculative_max_workers: int = 4
+  retrieval_backend: Literal["pinecone", "snapshot"] = "pinecone"
+  snapshot_path: str = "data/snapshot"
+  snapshot_rescore_factor: int = 4  # int8 candidates re-scored in float per result
+
+  # Chunking Configuration
+  chunking_strategy: str = "structure"  # characters | tokens | structure
+  chunk_size_tokens: int = 400
+  chunk_overlap_tokens: int = 40
+
+  # Checkpoint Configuration
+  checkpoint_enabled: bool = True  # persist graph state per request for resume-on-retry
+  checkpoint_path: str = "data/cache/checkpoints.sqlite"
+  checkpoint_reuse_seconds: float = 300.0  # completed runs are returned as-is within this window
+  checkpoint_ttl_seconds: float = 3600.0  # idle threads are garbage collected after this
+  checkpoint_gc_interval_seconds: float = 300.0
+  checkpoint_stale_run_seconds: float = 300.0  # runs still marked running after this are treated as crashed
+
+  # Session Configuration
+  session_max_sessions: int = 256
+  session_max_chunks: int = 128  # chunks (with embeddings) kept per session
+  session_max_turns: int = 10
+  session_history_turns: int = 3  # prior turns shown to the planner and summarizer
+  session_idle_ttl_seconds: float = 1800.0
+  session_match_threshold: float = 0.5  # min similarity for a session chunk to join the index results
+
+  # FAQ Configuration
+  faq_enabled: bool = False  # precompute answers to likely questions after indexing
+  faq_path: str = "data/cache/faq.sqlite"
+  faq_questions_per_section: int = 3
+  faq_max_section_chars: int = 6000  # section text shown to the question generator
+  faq_match_threshold: float = 0.9  # min similarity to serve a precomputed answer
+  faq_pause_seconds: float = 1.0  # idle time between background questions
+
+  # Debugging Configuration
+  profiling_sample_rate: float = 0.0  # share of requests profiled (needs pyinstrument)
+  profiling_dir: str = "data/profiles"
+  profiling_interval_seconds: float = 0.001
+
+  # Batch QA Configuration
+  batch_max_questions: int = 500
+  batch_max_concurrency: int = 4
 
   model_config = SettingsConfigDict(
     env_file=".env",
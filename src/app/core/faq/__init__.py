@@ -0,0 +1,6 @@
+"""Precomputed answers to likely questions, generated after indexing."""
+
+from .store import FAQEntry, FAQIndex, FAQMatch, get_faq_index
+from .questions import DocumentSection, generate_questions, group_sections
+
+__all__ = ["FAQEntry", "FAQIndex", "FAQMatch", "get_faq_index", "DocumentSection", "generate_questions", "group_sections"]
@@ -0,0 +1,90 @@
+"""Generate likely user questions for the sections of an indexed document."""
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import List
+
+from langchain_core.documents import Document
+
+from ..llm import create_chat_model
+
+logger = logging.getLogger(__name__)
+
+# Consecutive chunks grouped into one pseudo-section when chunks carry no
+# `section` heading (e.g. with the `characters` or `tokens` strategies)
+_CHUNKS_PER_UNTITLED_SECTION = 4
+
+# Sections shorter than this (e.g. a lone heading or a page footer) are skipped
+_MIN_SECTION_CHARS = 200
+
+FAQ_QUESTIONS_SYSTEM_PROMPT = """## Role
+You are a Question Generation Agent for the IKMS (Information Knowledge Management System). You anticipate the questions users are most likely to ask about a section of an indexed document.
+
+## Instructions
+1. Read the section text and identify its central facts, definitions, comparisons and trade-offs
+2. Write the {count} questions a reader is most likely to ask that the section answers
+3. Phrase each question the way a user would type it: short, self-contained, without referring to "this section" or "the text"
+4. Prefer distinct questions over rephrasings of the same one
+
+## Structure
+Return ONLY valid JSON in this exact format:
+{{"questions": ["question 1", "question 2", ...]}}"""
+
+
+@dataclass
+class DocumentSection:
+  """Consecutive chunks of a document that share a section heading."""
+
+  title: str | None
+  text: str
+  source: str
+
+
+def group_sections(chunks: List[Document], max_chars: int) -> List[DocumentSection]:
+  """Group indexed chunks into sections, in document order.
+
+  Chunks are grouped by their `section` metadata; chunks without one are
+  grouped into runs of a few consecutive chunks. Section text is truncated
+  to `max_chars` and sections with too little text are dropped.
+  """
+  groups: List[tuple[str | None, List[Document]]] = []
+  for chunk in chunks:
+    title = chunk.metadata.get("section")
+    previous = groups[-1] if groups else None
+    same_group = previous is not None and previous[0] == title and (
+      title is not None or len(previous[1]) < _CHUNKS_PER_UNTITLED_SECTION
+    )
+    if same_group:
+      previous[1].append(chunk)
+    else:
+      groups.append((title, [chunk]))
+
+  sections = []
+  for title, members in groups:
+    text = "\n\n".join(chunk.page_content for chunk in members)[:max_chars]
+    if len(text) < _MIN_SECTION_CHARS:
+      continue
+    sections.append(DocumentSection(title, text, members[0].metadata.get("source", "")))
+  return sections
+
+
+def generate_questions(section: DocumentSection, count: int) -> List[str]:
+  """Ask the chat model for the `count` most likely questions about a section.
+
+  Returns:
+    Up to `count` questions; empty if the model's output is not valid JSON.
+  """
+  heading = f"Section: {section.title}\n\n" if section.title else ""
+  messages = [
+    {"role": "system", "content": FAQ_QUESTIONS_SYSTEM_PROMPT.format(count=count)},
+    {"role": "user", "content": f"{heading}{section.text}"},
+  ]
+  response = create_chat_model(streaming=False).invoke(messages)
+
+  try:
+    questions = json.loads(str(response.content)).get("questions", [])
+  except (json.JSONDecodeError, AttributeError):
+    logger.warning("Could not parse generated questions for section %r.", section.title)
+    return []
+  return [question.strip() for question in questions if isinstance(question, str) and question.strip()][:count]
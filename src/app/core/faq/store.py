@@ -0,0 +1,193 @@
+"""Local index of precomputed answers to likely questions.
+
+Entries are generated in the background after a PDF is indexed (see
+`services.faq_service`) and stored in a SQLite file together with the
+embedding of their question. The embeddings are kept in memory as one
+normalized matrix, so matching a new question is a single dot product.
+
+Entries are grouped by the `source` they were generated from: re-indexing a
+file replaces its entries. Entries embedded with a different embeddings
+model than the one configured are ignored.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from ..config import get_settings
+
+
+@dataclass
+class FAQEntry:
+  """A precomputed question with its QA pipeline output."""
+
+  question: str
+  answer: str
+  context: str
+  plan: str | None
+  sub_questions: List[str] | None
+  source: str
+  section: str | None = None
+
+
+@dataclass
+class FAQMatch:
+  """The closest stored entry to a question and its cosine similarity."""
+
+  entry: FAQEntry
+  score: float
+
+
+class FAQIndex:
+  """SQLite-backed FAQ entries with an in-memory embedding matrix."""
+
+  def __init__(self, path: Path, embeddings_model: str) -> None:
+    self.path = Path(path)
+    self.embeddings_model = embeddings_model
+    self._lock = threading.Lock()
+    self.hits = 0
+    self.misses = 0
+
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+    with self._conn:
+      self._conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS faq (
+          source TEXT NOT NULL,
+          section TEXT,
+          question TEXT NOT NULL,
+          answer TEXT NOT NULL,
+          context TEXT NOT NULL,
+          plan TEXT,
+          sub_questions TEXT,
+          model TEXT NOT NULL,
+          vector BLOB NOT NULL,
+          created_at REAL NOT NULL
+        )
+        """
+      )
+      self._conn.execute("CREATE INDEX IF NOT EXISTS faq_source ON faq (source)")
+
+    self._entries: List[FAQEntry] = []
+    self._vectors = np.zeros((0, 0), dtype=np.float32)
+    self._load()
+
+  @staticmethod
+  def _unit(vector: Sequence[float]) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+  def _load(self) -> None:
+    """Rebuild the in-memory entries and embedding matrix from disk."""
+    rows = self._conn.execute(
+      "SELECT source, section, question, answer, context, plan, sub_questions, vector "
+      "FROM faq WHERE model = ? ORDER BY rowid",
+      (self.embeddings_model,),
+    ).fetchall()
+    self._entries = [
+      FAQEntry(
+        question=question,
+        answer=answer,
+        context=context,
+        plan=plan,
+        sub_questions=json.loads(sub_questions) if sub_questions else None,
+        source=source,
+        section=section,
+      )
+      for source, section, question, answer, context, plan, sub_questions, _vector in rows
+    ]
+    vectors = [np.frombuffer(row[-1], dtype=np.float32) for row in rows]
+    self._vectors = np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+  def __len__(self) -> int:
+    with self._lock:
+      return len(self._entries)
+
+  def add(self, entry: FAQEntry, vector: Sequence[float]) -> None:
+    """Store an entry under the embedding of its question."""
+    unit = self._unit(vector)
+    with self._lock, self._conn:
+      self._conn.execute(
+        "INSERT INTO faq (source, section, question, answer, context, plan, sub_questions, "
+        "model, vector, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+          entry.source,
+          entry.section,
+          entry.question,
+          entry.answer,
+          entry.context,
+          entry.plan,
+          json.dumps(entry.sub_questions) if entry.sub_questions is not None else None,
+          self.embeddings_model,
+          unit.tobytes(),
+          time.time(),
+        ),
+      )
+      self._entries.append(entry)
+      self._vectors = np.vstack([self._vectors.reshape(-1, len(unit)), unit[None, :]])
+
+  def delete_source(self, source: str) -> int:
+    """Remove every entry generated from `source`; returns how many were removed."""
+    with self._lock, self._conn:
+      removed = self._conn.execute("DELETE FROM faq WHERE source = ?", (source,)).rowcount
+      if removed:
+        self._load()
+      return removed
+
+  def match(self, vector: Sequence[float], threshold: float, count: bool = True) -> FAQMatch | None:
+    """Return the closest entry if its similarity is at least `threshold`.
+
+    Args:
+      vector: Embedding of the incoming question.
+      threshold: Minimum cosine similarity for a match.
+      count: Record the lookup in the hit/miss counters (off for the
+        builder's own duplicate checks).
+    """
+    with self._lock:
+      entries, vectors = self._entries, self._vectors
+
+    best = None
+    if entries:
+      scores = vectors @ self._unit(vector)
+      index = int(np.argmax(scores))
+      if scores[index] >= threshold:
+        best = FAQMatch(entries[index], float(scores[index]))
+
+    if count:
+      with self._lock:
+        if best is None:
+          self.misses += 1
+        else:
+          self.hits += 1
+    return best
+
+  def stats(self) -> Dict[str, Any]:
+    """Return the number of entries per source and hit/miss counters."""
+    with self._lock:
+      sources: Dict[str, int] = {}
+      for entry in self._entries:
+        sources[entry.source] = sources.get(entry.source, 0) + 1
+      lookups = self.hits + self.misses
+      return {
+        "path": str(self.path),
+        "entries": len(self._entries),
+        "sources": sources,
+        "hits": self.hits,
+        "misses": self.misses,
+        "hit_rate": self.hits / lookups if lookups else 0.0,
+      }
+
+
+@lru_cache(maxsize=1)
+def get_faq_index() -> FAQIndex:
+  """Get the process-wide FAQ index configured from settings."""
+  settings = get_settings()
+  return FAQIndex(Path(settings.faq_path), settings.openai_embeddings_model_name)
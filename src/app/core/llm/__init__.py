@@ -1,3 +1,4 @@
 from .factory import create_chat_model
+from .cache import CACHE_MODES, CachingChatOpenAI, LLMCacheMiss, ResponseCache, get_response_cache
 
-__all__ = ["create_chat_model"]
\ No newline at end of file
+__all__ = ["create_chat_model", "CACHE_MODES", "CachingChatOpenAI", "LLMCacheMiss", "ResponseCache", "get_response_cache"]
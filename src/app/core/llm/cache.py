@@ -0,0 +1,337 @@
+"""Deterministic, prompt-hash-keyed response cache for chat models.
+
+All agents call the chat model at `temperature=0.0` with deterministic
+inputs, so identical prompts can reuse the previous completion. Responses
+are stored in a local SQLite file keyed by a hash of the model parameters,
+bound tools and canonicalized messages. The same file doubles as a
+"cassette" for record/replay runs of the whole pipeline:
+
+- `read_write`: serve hits, call the model on misses and store the result
+  (least recently used entries are evicted beyond `llm_cache_max_entries`)
+- `record`: always call the model and store every response (no eviction)
+- `replay`: serve only from the cassette; a miss raises `LLMCacheMiss`
+- `off`: no caching
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import generate_from_stream
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI
+from pydantic import PrivateAttr
+
+from ..config import get_settings
+from ..tracing import trace_span
+
+CACHE_MODES = ("off", "read_write", "record", "replay")
+
+# Splits replayed content into word-sized pieces, keeping whitespace attached
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+
+class LLMCacheMiss(RuntimeError):
+  """Raised in replay mode when a request is not present in the cassette."""
+
+
+class ResponseCache:
+  """SQLite-backed key/value store for recorded responses.
+
+  Entries are namespaced by `kind` (e.g. "llm" or "retrieval") so a single
+  cassette file can hold every external call a pipeline run makes.
+  """
+
+  def __init__(self, path: Path, max_entries: int = 0) -> None:
+    self.path = Path(path)
+    self.max_entries = max_entries
+    self._lock = threading.Lock()
+    self.hits = 0
+    self.misses = 0
+
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+    with self._conn:
+      self._conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS responses (
+          kind TEXT NOT NULL,
+          key TEXT NOT NULL,
+          payload TEXT NOT NULL,
+          created_at REAL NOT NULL,
+          last_used REAL NOT NULL,
+          PRIMARY KEY (kind, key)
+        )
+        """
+      )
+      self._conn.execute(
+        "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+      )
+
+  def lookup(self, kind: str, key: str) -> Any | None:
+    """Return the stored payload for `key`, or None on a miss."""
+    with self._lock:
+      row = self._conn.execute(
+        "SELECT payload FROM responses WHERE kind = ? AND key = ?", (kind, key)
+      ).fetchone()
+      if row is None:
+        self.misses += 1
+        return None
+
+      self.hits += 1
+      with self._conn:
+        self._conn.execute(
+          "UPDATE responses SET last_used = ? WHERE kind = ? AND key = ?",
+          (time.time(), kind, key),
+        )
+      return json.loads(row[0])
+
+  def store(self, kind: str, key: str, payload: Any, evict: bool = True) -> None:
+    """Store a JSON-serializable payload, evicting the least recently used entries."""
+    now = time.time()
+    with self._lock, self._conn:
+      self._conn.execute(
+        "INSERT OR REPLACE INTO responses (kind, key, payload, created_at, last_used) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (kind, key, json.dumps(payload), now, now),
+      )
+      if evict and self.max_entries > 0:
+        self._conn.execute(
+          "DELETE FROM responses WHERE rowid IN ("
+          "  SELECT rowid FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?"
+          ")",
+          (self.max_entries,),
+        )
+
+  def stats(self) -> Dict[str, Any]:
+    """Return hit/miss counters and the number of stored entries."""
+    with self._lock:
+      entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+      lookups = self.hits + self.misses
+      return {
+        "path": str(self.path),
+        "entries": entries,
+        "max_entries": self.max_entries,
+        "hits": self.hits,
+        "misses": self.misses,
+        "hit_rate": self.hits / lookups if lookups else 0.0,
+      }
+
+
+@lru_cache(maxsize=1)
+def get_response_cache() -> ResponseCache | None:
+  """Get the process-wide response cache, or None when caching is off."""
+  settings = get_settings()
+  if settings.llm_cache_mode == "off":
+    return None
+  return ResponseCache(Path(settings.llm_cache_path), settings.llm_cache_max_entries)
+
+
+def _canonical_message(message: BaseMessage) -> Dict[str, Any]:
+  """Keep only the fields of a message that influence the completion.
+
+  Run ids, response metadata and token usage differ between otherwise
+  identical calls and would make the cache key unstable.
+  """
+  canonical: Dict[str, Any] = {"type": message.type, "content": message.content}
+  if isinstance(message, AIMessage) and message.tool_calls:
+    canonical["tool_calls"] = [
+      {"name": call["name"], "args": call["args"], "id": call.get("id")}
+      for call in message.tool_calls
+    ]
+  for field in ("tool_call_id", "name"):
+    value = getattr(message, field, None)
+    if value:
+      canonical[field] = value
+  return canonical
+
+
+def _record_usage(span, message: BaseMessage) -> None:
+  """Attach token usage reported by the API (if any) and tool calls to a trace span."""
+  usage = getattr(message, "usage_metadata", None) or {}
+  span.set(
+    input_tokens=usage.get("input_tokens"),
+    output_tokens=usage.get("output_tokens"),
+    tool_calls=[call["name"] for call in getattr(message, "tool_calls", None) or []] or None,
+  )
+
+
+def _replay_chunks(message: AIMessage) -> Iterator[ChatGenerationChunk]:
+  """Yield a cached message as word-sized stream chunks, tool calls last."""
+  content = message.content if isinstance(message.content, str) else ""
+  for piece in _TOKEN_RE.findall(content):
+    yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+  if message.tool_calls:
+    yield ChatGenerationChunk(
+      message=AIMessageChunk(
+        content="",
+        tool_call_chunks=[
+          {
+            "name": call["name"],
+            "args": json.dumps(call["args"]),
+            "id": call.get("id"),
+            "index": index,
+          }
+          for index, call in enumerate(message.tool_calls)
+        ],
+      )
+    )
+
+
+class CachingChatOpenAI(ChatOpenAI):
+  """ChatOpenAI that serves repeated prompts from a `ResponseCache`.
+
+  Both the blocking and the streaming paths are cached. Streaming hits are
+  replayed chunk by chunk, so token streaming (e.g. of the verification
+  agent) behaves the same whether a response is live or recorded. Every
+  call is recorded as an `llm` span (cache result, token usage) when a
+  request trace is active.
+  """
+
+  _response_cache: ResponseCache | None = PrivateAttr(default=None)
+  _cache_mode: str = PrivateAttr(default="off")
+
+  def with_response_cache(self, cache: ResponseCache | None, mode: str) -> "CachingChatOpenAI":
+    self._response_cache = cache
+    self._cache_mode = mode
+    return self
+
+  def _cache_key(self, messages: List[BaseMessage], stop: Optional[List[str]], **kwargs: Any) -> str:
+    payload = {
+      "llm": self._get_llm_string(stop=stop, **kwargs),
+      "messages": [_canonical_message(message) for message in messages],
+    }
+    serialized = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+  def _lookup(self, key: str) -> AIMessage | None:
+    if self._response_cache is None or self._cache_mode == "record":
+      return None
+
+    payload = self._response_cache.lookup("llm", key)
+    if payload is None:
+      if self._cache_mode == "replay":
+        raise LLMCacheMiss(f"No recorded LLM response for prompt hash {key[:12]}.")
+      return None
+    return messages_from_dict([payload])[0]
+
+  def _store(self, key: str, message: BaseMessage) -> None:
+    if self._response_cache is None:
+      return
+    if isinstance(message, AIMessageChunk):
+      message = AIMessage(
+        content=message.content,
+        tool_calls=message.tool_calls,
+        response_metadata=message.response_metadata,
+      )
+    self._response_cache.store(
+      "llm", key, message_to_dict(message), evict=self._cache_mode == "read_write"
+    )
+
+  def _span_attrs(self, messages: List[BaseMessage]) -> Dict[str, Any]:
+    cache = "off" if self._response_cache is None else ("miss" if self._cache_mode != "record" else "record")
+    return {"model": self.model_name, "messages": len(messages), "cache": cache}
+
+  def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+    with trace_span("chat_model", "llm", **self._span_attrs(messages)) as span:
+      if self._response_cache is None:
+        result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        _record_usage(span, result.generations[0].message)
+        return result
+
+      key = self._cache_key(messages, stop, **kwargs)
+      cached = self._lookup(key)
+      if cached is not None:
+        span.set(cache="hit")
+        return ChatResult(generations=[ChatGeneration(message=cached)])
+
+      result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+      _record_usage(span, result.generations[0].message)
+      self._store(key, result.generations[0].message)
+      return result
+
+  def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+    with trace_span("chat_model", "llm", streamed=True, **self._span_attrs(messages)) as span:
+      if self._response_cache is None:
+        chunks = []
+        for chunk in super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+          chunks.append(chunk)
+          yield chunk
+        if chunks:
+          _record_usage(span, generate_from_stream(iter(chunks)).generations[0].message)
+        return
+
+      key = self._cache_key(messages, stop, **kwargs)
+      cached = self._lookup(key)
+      if cached is not None:
+        span.set(cache="hit")
+        for chunk in _replay_chunks(cached):
+          if run_manager:
+            run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+          yield chunk
+        return
+
+      chunks = []
+      for chunk in super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+        chunks.append(chunk)
+        yield chunk
+      if chunks:
+        message = generate_from_stream(iter(chunks)).generations[0].message
+        _record_usage(span, message)
+        self._store(key, message)
+
+  async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+    with trace_span("chat_model", "llm", **self._span_attrs(messages)) as span:
+      if self._response_cache is None:
+        result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        _record_usage(span, result.generations[0].message)
+        return result
+
+      key = self._cache_key(messages, stop, **kwargs)
+      cached = self._lookup(key)
+      if cached is not None:
+        span.set(cache="hit")
+        return ChatResult(generations=[ChatGeneration(message=cached)])
+
+      result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+      _record_usage(span, result.generations[0].message)
+      self._store(key, result.generations[0].message)
+      return result
+
+  async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+    with trace_span("chat_model", "llm", streamed=True, **self._span_attrs(messages)) as span:
+      if self._response_cache is None:
+        chunks = []
+        async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+          chunks.append(chunk)
+          yield chunk
+        if chunks:
+          _record_usage(span, generate_from_stream(iter(chunks)).generations[0].message)
+        return
+
+      key = self._cache_key(messages, stop, **kwargs)
+      cached = self._lookup(key)
+      if cached is not None:
+        span.set(cache="hit")
+        for chunk in _replay_chunks(cached):
+          if run_manager:
+            await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+          yield chunk
+        return
+
+      chunks = []
+      async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+        chunks.append(chunk)
+        yield chunk
+      if chunks:
+        message = generate_from_stream(iter(chunks)).generations[0].message
+        _record_usage(span, message)
+        self._store(key, message)
@@ -4,12 +4,17 @@ from functools import lru_cache
 from langchain_openai import ChatOpenAI
 
 from ..config import get_settings
+from .cache import CachingChatOpenAI, get_response_cache
 
 
 @lru_cache(maxsize=4)
 def create_chat_model(temperature: float = 0.0, streaming: bool = True) -> ChatOpenAI:
   """Create a LangChain v1 ChatOpenAI instance.
 
+  Deterministic models (`temperature=0.0`) are backed by the on-disk
+  response cache unless `llm_cache_mode` is "off"; record/replay modes
+  apply at any temperature so whole runs can be replayed offline.
+
   Args:
   temperature: Model temperature (default: 0.0 for deterministic outputs).
   streaming: Enable streaming mode for token-by-token output (default: True).
@@ -18,9 +23,18 @@ def create_chat_model(temperature: float = 0.0, streaming: bool = True) -> ChatO
     Configured ChatOpenAI instance.
   """
   settings = get_settings()
-  return ChatOpenAI(
+  model = CachingChatOpenAI(
     model=settings.openai_model_name,
     api_key=settings.openai_api_key,
     temperature=temperature,
     streaming=streaming,
-  )
\ No newline at end of file
+    # Report token usage on streamed responses too (used by debug waterfalls)
+    stream_usage=True,
+  )
+
+  mode = settings.llm_cache_mode
+  if mode == "read_write" and temperature != 0.0:
+    mode = "off"
+
+  cache = get_response_cache() if mode != "off" else None
+  return model.with_response_cache(cache, mode)
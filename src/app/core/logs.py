@@ -0,0 +1,26 @@
+"""Logging setup for the application's own loggers."""
+
+import logging
+
+from .config import get_settings
+
+# Parent of every module logger in the app (e.g. "src.app.core.retrieval.vector_store")
+APP_LOGGER_NAME = __name__.rsplit(".", 2)[0]
+
+
+def configure_logging() -> None:
+  """Emit the app's log records at `log_level` on stderr.
+
+  uvicorn only configures its own loggers, so without this, records below
+  WARNING (e.g. adaptive retrieval decisions) are dropped. If the root
+  logger already has handlers (logging configured elsewhere), only the
+  level is set and records propagate to those handlers.
+  """
+  app_logger = logging.getLogger(APP_LOGGER_NAME)
+  app_logger.setLevel(get_settings().log_level.upper())
+  if app_logger.handlers or logging.getLogger().handlers:
+    return
+
+  handler = logging.StreamHandler()
+  handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+  app_logger.addHandler(handler)
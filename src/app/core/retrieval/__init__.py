@@ -1,6 +1,11 @@
 """Retrieval module for vector store operations."""
 
-from .vector_store import get_retriever, retrieve, index_documents
-from .serialization import serialize_chunks
+from .vector_store import get_retriever, retrieve, retrieve_many, index_documents, index_chunks, get_embeddings, export_snapshot, current_corpus_version
+from .cache import RetrievalCache, get_retrieval_cache, normalize_query
+from .depth import choose_k
+from .mmr import maximal_marginal_relevance
+from .options import RetrievalOptions, current_retrieval_options
+from .snapshot import VectorSnapshot, get_snapshot, use_snapshot, quantize
+from .serialization import serialize_chunks, chunk_id, chunk_page, chunk_to_event
 
-__all__ = ["get_retriever", "retrieve", "index_documents", "serialize_chunks"]
\ No newline at end of file
+__all__ = ["get_retriever", "retrieve", "retrieve_many", "index_documents", "index_chunks", "get_embeddings", "export_snapshot", "current_corpus_version", "VectorSnapshot", "get_snapshot", "use_snapshot", "quantize", "RetrievalCache", "get_retrieval_cache", "normalize_query", "choose_k", "maximal_marginal_relevance", "RetrievalOptions", "current_retrieval_options", "serialize_chunks", "chunk_id", "chunk_page", "chunk_to_event"]
\ No newline at end of file
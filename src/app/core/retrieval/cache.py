@@ -0,0 +1,202 @@
+"""In-process LRU/TTL cache for query-level retrieval results.
+
+Planner sub-questions repeat heavily across user questions, so `retrieve()`
+results are cached by normalized query, `k` and scope. Entries hold only
+compact `(chunk_id, score)` pairs; each Document (and its embedding, when
+known) is stored once in a shared, reference-counted table no matter how
+many cached queries return it. The embeddings let cache hits seed
+conversation sessions just like fresh searches.
+
+All entries are tied to a corpus version. `index_documents` bumps the version
+after every upsert, which invalidates everything cached against the old corpus.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from ..config import get_settings
+from .serialization import chunk_id
+
+CacheKey = Tuple[str, int, str, Tuple[Any, ...]]
+
+
+def normalize_query(query: str) -> str:
+  """Normalize a query string so trivially different phrasings compare equal."""
+  return " ".join(query.split()).casefold()
+
+
+@dataclass
+class _CacheEntry:
+  """Compact cached result: chunk ids with scores, plus freshness info."""
+
+  hits: Tuple[Tuple[str, float], ...]
+  corpus_version: int
+  expires_at: float
+
+
+class RetrievalCache:
+  """Thread-safe LRU cache with TTL expiry and corpus-version invalidation."""
+
+  def __init__(self, max_entries: int = 1024, ttl_seconds: float = 900.0) -> None:
+    self.max_entries = max_entries
+    self.ttl_seconds = ttl_seconds
+    self._entries: "OrderedDict[CacheKey, _CacheEntry]" = OrderedDict()
+    self._documents: Dict[str, Document] = {}
+    self._vectors: Dict[str, np.ndarray] = {}
+    self._doc_refs: Dict[str, int] = {}
+    self._lock = threading.Lock()
+    self._corpus_version = 0
+
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.expirations = 0
+    self.invalidations = 0
+
+  @property
+  def enabled(self) -> bool:
+    return self.max_entries > 0
+
+  @property
+  def corpus_version(self) -> int:
+    return self._corpus_version
+
+  @staticmethod
+  def make_key(
+    query: str, k: int, scope: str | None = None, variant: Tuple[Any, ...] = ()
+  ) -> CacheKey:
+    """Build a cache key; `variant` holds extra ranking parameters (e.g. MMR)."""
+    return (normalize_query(query), k, scope or "", variant)
+
+  def get(self, key: CacheKey) -> List[Tuple[Document, float]] | None:
+    """Return cached results for `key`, or None on a miss."""
+    if not self.enabled:
+      return None
+
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None:
+        self.misses += 1
+        return None
+
+      if entry.corpus_version != self._corpus_version or entry.expires_at <= time.monotonic():
+        self._remove(key)
+        self.expirations += 1
+        self.misses += 1
+        return None
+
+      self._entries.move_to_end(key)
+      self.hits += 1
+      return [(self._documents[doc_id], score) for doc_id, score in entry.hits]
+
+  def vectors(self, results: List[Tuple[Document, float]]) -> Dict[str, np.ndarray]:
+    """Return the stored embeddings of cached results, by Document id."""
+    with self._lock:
+      found = {}
+      for doc, _score in results:
+        vector = self._vectors.get(chunk_id(doc))
+        if vector is not None:
+          found[doc.id] = vector
+      return found
+
+  def put(
+    self,
+    key: CacheKey,
+    results: List[Tuple[Document, float]],
+    corpus_version: int,
+    vectors: Dict[str, Sequence[float]] | None = None,
+  ) -> None:
+    """Store results computed against `corpus_version`.
+
+    Results computed before a concurrent corpus bump are silently dropped.
+    `vectors` optionally maps Document ids to their embeddings.
+    """
+    if not self.enabled:
+      return
+
+    with self._lock:
+      if corpus_version != self._corpus_version:
+        return
+
+      if key in self._entries:
+        self._remove(key)
+
+      hits = []
+      for doc, score in results:
+        doc_id = chunk_id(doc)
+        self._documents.setdefault(doc_id, doc)
+        if vectors and doc.id in vectors and doc_id not in self._vectors:
+          self._vectors[doc_id] = np.asarray(vectors[doc.id], dtype=np.float32)
+        self._doc_refs[doc_id] = self._doc_refs.get(doc_id, 0) + 1
+        hits.append((doc_id, float(score)))
+
+      self._entries[key] = _CacheEntry(
+        hits=tuple(hits),
+        corpus_version=corpus_version,
+        expires_at=time.monotonic() + self.ttl_seconds,
+      )
+
+      while len(self._entries) > self.max_entries:
+        oldest_key = next(iter(self._entries))
+        self._remove(oldest_key)
+        self.evictions += 1
+
+  def bump_corpus_version(self) -> int:
+    """Invalidate all cached results after the corpus changed."""
+    with self._lock:
+      self._corpus_version += 1
+      self.invalidations += len(self._entries)
+      self._entries.clear()
+      self._documents.clear()
+      self._vectors.clear()
+      self._doc_refs.clear()
+      return self._corpus_version
+
+  def stats(self) -> Dict[str, Any]:
+    """Return hit/miss counters and current cache size."""
+    with self._lock:
+      lookups = self.hits + self.misses
+      return {
+        "enabled": self.enabled,
+        "corpus_version": self._corpus_version,
+        "entries": len(self._entries),
+        "documents": len(self._documents),
+        "vectors": len(self._vectors),
+        "max_entries": self.max_entries,
+        "ttl_seconds": self.ttl_seconds,
+        "hits": self.hits,
+        "misses": self.misses,
+        "hit_rate": self.hits / lookups if lookups else 0.0,
+        "evictions": self.evictions,
+        "expirations": self.expirations,
+        "invalidations": self.invalidations,
+      }
+
+  def _remove(self, key: CacheKey) -> None:
+    """Drop an entry and release its document references (lock must be held)."""
+    entry = self._entries.pop(key)
+    for doc_id, _score in entry.hits:
+      remaining = self._doc_refs[doc_id] - 1
+      if remaining:
+        self._doc_refs[doc_id] = remaining
+      else:
+        del self._doc_refs[doc_id]
+        del self._documents[doc_id]
+        self._vectors.pop(doc_id, None)
+
+
+@lru_cache(maxsize=1)
+def get_retrieval_cache() -> RetrievalCache:
+  """Get the process-wide retrieval cache configured from settings."""
+  settings = get_settings()
+  return RetrievalCache(
+    max_entries=settings.retrieval_cache_max_entries,
+    ttl_seconds=settings.retrieval_cache_ttl_seconds,
+  )
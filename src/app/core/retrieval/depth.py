@@ -0,0 +1,43 @@
+"""Adaptive retrieval depth based on similarity scores."""
+
+from typing import Sequence, Tuple
+
+
+def choose_k(
+  scores: Sequence[float],
+  min_k: int,
+  max_k: int,
+  score_threshold: float | None = None,
+  score_gap: float | None = None,
+) -> Tuple[int, str]:
+  """Decide how many results to keep from a relevance-sorted score list.
+
+  Results are kept while they score at least `score_threshold` and until
+  the first drop of more than `score_gap` between consecutive scores. The
+  result is always clamped to `[min_k, max_k]` (and to the candidates
+  available), so easy queries with one dominant hit send little context
+  downstream while broad queries with many similar hits get more.
+
+  Args:
+    scores: Similarity scores sorted from best to worst.
+    min_k: Minimum number of results to keep.
+    max_k: Maximum number of results to keep.
+    score_threshold: Minimum similarity for a result to be kept.
+    score_gap: Maximum allowed drop between consecutive scores.
+
+  Returns:
+    Tuple of (number of results to keep, reason for the cut-off).
+  """
+  available = len(scores)
+  limit = min(max_k, available)
+  min_k = min(min_k, limit)
+
+  for index in range(limit):
+    if index < min_k:
+      continue
+    if score_threshold is not None and scores[index] < score_threshold:
+      return index, "threshold"
+    if score_gap is not None and scores[index - 1] - scores[index] > score_gap:
+      return index, "gap"
+
+  return limit, "max_k" if limit == max_k else "exhausted"
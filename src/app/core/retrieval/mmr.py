@@ -0,0 +1,59 @@
+"""Vectorized maximal-marginal-relevance (MMR) re-ranking."""
+
+from typing import List, Sequence
+
+import numpy as np
+
+
+def maximal_marginal_relevance(
+  query_vector: Sequence[float],
+  candidate_vectors: Sequence[Sequence[float]],
+  k: int,
+  lambda_mult: float = 0.5,
+) -> List[int]:
+  """Select a relevant but diverse subset of candidates with MMR.
+
+  Each step picks the candidate maximizing
+  `lambda_mult * sim(query, c) - (1 - lambda_mult) * max(sim(c, selected))`.
+  Similarities are computed once as matrix products and the running
+  "max similarity to the selected set" is updated in place, so each step is
+  a single vectorized pass over the candidates.
+
+  Args:
+    query_vector: Embedding of the query.
+    candidate_vectors: Embeddings of the over-fetched candidates.
+    k: Number of candidates to select.
+    lambda_mult: Trade-off between relevance (1.0) and diversity (0.0).
+
+  Returns:
+    Indices into `candidate_vectors` in selection order.
+  """
+  candidates = np.asarray(candidate_vectors, dtype=np.float32)
+  if k <= 0 or candidates.size == 0:
+    return []
+
+  query = np.asarray(query_vector, dtype=np.float32)
+  candidates = candidates / np.clip(
+    np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12, None
+  )
+  query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+  relevance = candidates @ query
+  similarity = candidates @ candidates.T
+
+  k = min(k, len(candidates))
+  first = int(np.argmax(relevance))
+  selected = [first]
+  max_similarity = similarity[first].copy()
+  available = np.ones(len(candidates), dtype=bool)
+  available[first] = False
+
+  while len(selected) < k:
+    scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+    scores[~available] = -np.inf
+    best = int(np.argmax(scores))
+    selected.append(best)
+    available[best] = False
+    np.maximum(max_similarity, similarity[best], out=max_similarity)
+
+  return selected
@@ -0,0 +1,35 @@
+"""Per-request retrieval options."""
+
+from contextvars import ContextVar
+
+from pydantic import BaseModel, Field
+
+
+class RetrievalOptions(BaseModel):
+  """Optional overrides for how chunks are retrieved for a single request.
+
+  Unset fields fall back to the matching `retrieval_*` `Settings` defaults.
+  MMR re-ranking is applied whenever `fetch_k` is larger than `k`.
+
+  With `adaptive` enabled, `k` is ignored and the number of chunks is chosen
+  per query between `min_k` and `max_k`: results below `score_threshold`
+  are cut off, as is everything after a drop of more than `score_gap`
+  between consecutive scores.
+  """
+
+  k: int | None = Field(default=None, ge=1, le=50)
+  fetch_k: int | None = Field(default=None, ge=1, le=200)
+  lambda_mult: float | None = Field(default=None, ge=0.0, le=1.0)
+  adaptive: bool | None = None
+  min_k: int | None = Field(default=None, ge=1, le=50)
+  max_k: int | None = Field(default=None, ge=1, le=50)
+  score_threshold: float | None = Field(default=None, ge=-1.0, le=1.0)
+  score_gap: float | None = Field(default=None, ge=0.0, le=2.0)
+
+
+# Options for the request currently being processed. Set by the retrieval
+# node and read by `retrieval_tool`, which is called by the retrieval agent
+# and therefore cannot receive them as regular arguments.
+current_retrieval_options: ContextVar[RetrievalOptions | None] = ContextVar(
+  "current_retrieval_options", default=None
+)
@@ -1,9 +1,42 @@
 """Utilities for serializing retrieved document chunks."""
 
-from typing import List
+import hashlib
+from typing import Any, Dict, List
 
 from langchain_core.documents import Document
 
+def chunk_id(doc: Document) -> str:
+  """Return a stable identifier for a chunk.
+
+  Uses the vector store id when available, otherwise a hash of the content.
+  """
+  if doc.id:
+    return str(doc.id)
+  return hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()[:16]
+
+def _page_number(value: Any) -> Any:
+  """Pinecone returns numeric metadata as floats; show whole pages as ints."""
+  if isinstance(value, float) and value.is_integer():
+    return int(value)
+  return value
+
+def chunk_page(doc: Document) -> Any:
+  """Return the page (or "first-last" page span) of a chunk, or "unknown"."""
+  page = _page_number(doc.metadata.get("page") or doc.metadata.get("page_number", "unknown"))
+  page_end = _page_number(doc.metadata.get("page_end"))
+  if page_end and page_end != page:
+    return f"{page}-{page_end}"
+  return page
+
+def chunk_to_event(doc: Document, score: float | None = None) -> Dict[str, Any]:
+  """Serialize a chunk into a compact JSON-friendly dict for client events."""
+  return {
+    "id": chunk_id(doc),
+    "page": chunk_page(doc),
+    "score": score,
+    "text": doc.page_content.strip(),
+  }
+
 def serialize_chunks(docs: List[Document]) -> str:
   """Serialize a list of Document objects into a formatted CONTEXT string.
 
@@ -23,9 +56,7 @@ def serialize_chunks(docs: List[Document]) -> str:
 
   for idx, doc in enumerate(docs, start=1):
     # Extract page number from metadata
-    page_num = doc.metadata.get("page") or doc.metadata.get(
-      "page_number", "unknown"
-    )
+    page_num = chunk_page(doc)
 
     # Format chunk with index and page number
     chunk_header = f"Chunk {idx} (page={page_num}):"
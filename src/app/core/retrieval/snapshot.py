@@ -0,0 +1,468 @@
+"""Local int8-quantized, memory-mapped snapshot of the Pinecone index.
+
+The corpus is small enough to search on each API node, so the vectors and
+metadata written by `index_documents` can be exported into a directory:
+
+- `codes.i8`: int8 codes, one row per vector, with a per-vector scale
+  (`scales.npy`) so that `vector ~= code * scale`
+- `vectors.f32`: the original float32 vectors, used only to re-score the
+  best candidates of the quantized search
+- `norms.npy`: float32 vector norms, for cosine similarity
+- `records.jsonl` + `offsets.npy`: one JSON record (`id`, `metadata`) per
+  vector, addressed by byte offset
+- `manifest.json`: vector count, dimension, namespace and embeddings model
+
+Each export is written to its own version directory inside the snapshot
+directory, and a `CURRENT` file naming the live version is then atomically
+replaced, so readers always see either the previous or the new export in
+full. Snapshot directories written before versioning (files directly in the
+directory) are still read.
+
+Codes and vectors are memory-mapped, so only the int8 codes (a quarter of
+the float size) are scanned per query, and the float rows and records of
+the few re-scored candidates are paged in on demand.
+
+The export usually runs in a separate process, so `get_snapshot` watches
+`CURRENT` and loads a new export as soon as it appears. The export lists
+vector ids with `Index.list`, which only serverless Pinecone indexes support.
+"""
+
+import json
+import logging
+import mmap
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List
+
+import numpy as np
+
+from ..config import get_settings
+from .cache import get_retrieval_cache
+
+logger = logging.getLogger(__name__)
+
+_CODES_FILE = "codes.i8"
+_VECTORS_FILE = "vectors.f32"
+_SCALES_FILE = "scales.npy"
+_NORMS_FILE = "norms.npy"
+_RECORDS_FILE = "records.jsonl"
+_OFFSETS_FILE = "offsets.npy"
+_MANIFEST_FILE = "manifest.json"
+_CURRENT_FILE = "CURRENT"
+
+# Rows converted to float32 at a time while scanning the int8 codes
+_SCAN_BLOCK_ROWS = 4096
+
+
+@dataclass
+class SnapshotMatch:
+  """A search result shaped like a Pinecone query match."""
+
+  id: str
+  score: float
+  metadata: Dict[str, Any]
+  values: List[float] | None = None
+
+
+def quantize(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+  """Symmetrically quantize float vectors to int8 with one scale per vector.
+
+  Returns:
+    Tuple of (int8 codes, float32 scales) with `vectors ~= codes * scales[:, None]`.
+  """
+  vectors = np.asarray(vectors, dtype=np.float32)
+  scales = np.abs(vectors).max(axis=1) / 127.0
+  scales[scales == 0] = 1.0
+  codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+  return codes, scales.astype(np.float32)
+
+
+def _iter_index(index, namespace: str | None, batch_size: int) -> Iterable[tuple[str, List[float], Dict[str, Any]]]:
+  """Yield (id, values, metadata) for every vector in a Pinecone namespace.
+
+  Raises:
+    RuntimeError: If the ids cannot be listed, e.g. on a pod-based index
+      (only serverless indexes support listing).
+  """
+  pages = index.list(namespace=namespace, limit=batch_size)
+  while True:
+    try:
+      ids = next(pages)
+    except StopIteration:
+      return
+    except Exception as exc:
+      raise RuntimeError(
+        "Could not list the vector ids to export. Snapshots can only be "
+        "exported from serverless Pinecone indexes."
+      ) from exc
+    if not ids:
+      continue
+    response = index.fetch(ids=list(ids), namespace=namespace)
+    for vector_id in ids:
+      vector = response.vectors.get(vector_id)
+      if vector is not None:
+        yield vector_id, vector.values, dict(vector.metadata or {})
+
+
+def write_snapshot(
+  index,
+  path: Path,
+  namespace: str | None = None,
+  batch_size: int = 100,
+) -> Dict[str, Any]:
+  """Export every vector of a Pinecone namespace into a snapshot directory.
+
+  Vectors are streamed to disk batch by batch, so the export never holds the
+  whole corpus in memory. The export is written to a new version directory
+  inside `path` and published by atomically replacing `path/CURRENT`, so
+  readers never see a partial export. Older versions are then removed.
+
+  Args:
+    index: Serverless Pinecone index client (see `_iter_index`).
+    path: Snapshot directory.
+    namespace: Pinecone namespace to export (default namespace if None).
+    batch_size: Ids listed and fetched per request.
+
+  Returns:
+    The snapshot manifest.
+
+  Raises:
+    ValueError: If the namespace contains no vectors.
+    RuntimeError: If the index does not support listing vector ids.
+  """
+  path = Path(path)
+  version = f"v{time.time_ns()}"
+  staging = path / version
+  staging.mkdir(parents=True)
+  try:
+    manifest = _write_version(index, staging, namespace, batch_size)
+  except BaseException:
+    shutil.rmtree(staging, ignore_errors=True)
+    raise
+
+  pointer = path / (_CURRENT_FILE + ".tmp")
+  pointer.write_text(version)
+  os.replace(pointer, path / _CURRENT_FILE)
+
+  # Servers still reading an older version keep their open maps (POSIX);
+  # anything that cannot be removed now is removed by the next export
+  for entry in path.iterdir():
+    if entry.name in (version, _CURRENT_FILE):
+      continue
+    if entry.is_dir():
+      shutil.rmtree(entry, ignore_errors=True)
+    else:
+      entry.unlink(missing_ok=True)
+  return manifest
+
+
+def _write_version(
+  index,
+  staging: Path,
+  namespace: str | None,
+  batch_size: int,
+) -> Dict[str, Any]:
+  """Write one snapshot version into the empty `staging` directory."""
+  scales: List[np.ndarray] = []
+  norms: List[np.ndarray] = []
+  offsets = [0]
+  dimension = None
+  count = 0
+
+  with open(staging / _CODES_FILE, "wb") as codes_file, \
+      open(staging / _VECTORS_FILE, "wb") as vectors_file, \
+      open(staging / _RECORDS_FILE, "wb") as records_file:
+    batch: List[tuple[str, List[float], Dict[str, Any]]] = []
+
+    def _flush() -> None:
+      nonlocal dimension, count
+      if not batch:
+        return
+      vectors = np.asarray([values for _id, values, _meta in batch], dtype=np.float32)
+      if dimension is None:
+        dimension = vectors.shape[1]
+      codes, batch_scales = quantize(vectors)
+      codes_file.write(codes.tobytes())
+      vectors_file.write(vectors.tobytes())
+      scales.append(batch_scales)
+      norms.append(np.linalg.norm(vectors, axis=1).astype(np.float32))
+      for vector_id, _values, metadata in batch:
+        line = json.dumps({"id": vector_id, "metadata": metadata}).encode("utf-8") + b"\n"
+        records_file.write(line)
+        offsets.append(offsets[-1] + len(line))
+      count += len(batch)
+      batch.clear()
+
+    for item in _iter_index(index, namespace, batch_size):
+      batch.append(item)
+      if len(batch) >= batch_size:
+        _flush()
+    _flush()
+
+  if count == 0:
+    raise ValueError(f"Namespace {namespace or ''!r} has no vectors to export.")
+
+  np.save(staging / _SCALES_FILE, np.concatenate(scales))
+  np.save(staging / _NORMS_FILE, np.concatenate(norms))
+  np.save(staging / _OFFSETS_FILE, np.asarray(offsets, dtype=np.int64))
+
+  manifest = {
+    "count": count,
+    "dimension": dimension,
+    "namespace": namespace or "",
+    "embeddings_model": get_settings().openai_embeddings_model_name,
+    "quantization": "int8",
+    "created_at": time.time(),
+  }
+  (staging / _MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+  return manifest
+
+
+def _version_path(path: Path) -> Path:
+  """Directory holding the live version of a snapshot directory."""
+  try:
+    return path / (path / _CURRENT_FILE).read_text().strip()
+  except FileNotFoundError:
+    # Written before exports were versioned
+    return path
+
+
+class VectorSnapshot:
+  """Read-only, memory-mapped view of an exported snapshot."""
+
+  def __init__(self, path: Path) -> None:
+    self.path = _version_path(Path(path))
+    self.manifest = json.loads((self.path / _MANIFEST_FILE).read_text())
+    self.count = self.manifest["count"]
+    self.dimension = self.manifest["dimension"]
+    self.namespace = self.manifest["namespace"]
+
+    shape = (self.count, self.dimension)
+    self.codes = np.memmap(self.path / _CODES_FILE, dtype=np.int8, mode="r", shape=shape)
+    self.vectors = np.memmap(self.path / _VECTORS_FILE, dtype=np.float32, mode="r", shape=shape)
+    self.scales = np.load(self.path / _SCALES_FILE)
+    self.norms = np.load(self.path / _NORMS_FILE)
+    self.offsets = np.load(self.path / _OFFSETS_FILE)
+
+    self._records_file = open(self.path / _RECORDS_FILE, "rb")
+    self._records = mmap.mmap(self._records_file.fileno(), 0, access=mmap.ACCESS_READ)
+    # Queries currently using the snapshot (see `use_snapshot`)
+    self._users = 0
+
+  def close(self) -> None:
+    """Unmap the codes, vectors and records and close the records file.
+
+    The snapshot cannot be queried afterwards.
+    """
+    if self._records_file.closed:
+      return
+    # A memmap is unmapped once no array references it
+    self.codes = self.vectors = None
+    self._records.close()
+    self._records_file.close()
+
+  @staticmethod
+  def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+  @staticmethod
+  def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+      return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+  def approximate_scores(self, vector) -> np.ndarray:
+    """Cosine similarity of the query to every vector, from the int8 codes."""
+    query = self._unit(vector)
+    scores = np.empty(self.count, dtype=np.float32)
+    for start in range(0, self.count, _SCAN_BLOCK_ROWS):
+      end = min(start + _SCAN_BLOCK_ROWS, self.count)
+      scores[start:end] = self.codes[start:end].astype(np.float32) @ query
+    scores *= self.scales
+    scores /= np.clip(self.norms, 1e-12, None)
+    return scores
+
+  def exact_scores(self, vector) -> np.ndarray:
+    """Cosine similarity of the query to every vector, from the float vectors."""
+    query = self._unit(vector)
+    scores = np.empty(self.count, dtype=np.float32)
+    for start in range(0, self.count, _SCAN_BLOCK_ROWS):
+      end = min(start + _SCAN_BLOCK_ROWS, self.count)
+      scores[start:end] = self.vectors[start:end] @ query
+    scores /= np.clip(self.norms, 1e-12, None)
+    return scores
+
+  def search(self, vector, top_k: int, rescore_k: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Find the `top_k` nearest vectors.
+
+    The int8 codes are scanned for `rescore_k` candidates, which are then
+    re-scored with their float vectors. With `rescore_k=0` the quantized
+    scores are returned as-is.
+
+    Returns:
+      Tuple of (row indices, cosine scores), best match first.
+    """
+    approximate = self.approximate_scores(vector)
+    if not rescore_k:
+      top = self._top(approximate, top_k)
+      return top, approximate[top]
+
+    candidates = np.sort(self._top(approximate, max(rescore_k, top_k)))
+    exact = (self.vectors[candidates] @ self._unit(vector)) / np.clip(self.norms[candidates], 1e-12, None)
+    order = self._top(exact, top_k)
+    return candidates[order], exact[order]
+
+  def record(self, row: int) -> Dict[str, Any]:
+    """Return the stored `id` and `metadata` of a row."""
+    start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+    return json.loads(self._records[start:end])
+
+  def query(self, vector, top_k: int, include_values: bool = False) -> List[SnapshotMatch]:
+    """Search the snapshot, returning Pinecone-style matches."""
+    rescore_k = top_k * max(get_settings().snapshot_rescore_factor, 1)
+    rows, scores = self.search(vector, top_k, rescore_k)
+    matches = []
+    for row, score in zip(rows, scores):
+      record = self.record(int(row))
+      matches.append(
+        SnapshotMatch(
+          id=record["id"],
+          score=float(score),
+          metadata=record["metadata"],
+          values=self.vectors[row].tolist() if include_values else None,
+        )
+      )
+    return matches
+
+  def footprint(self) -> Dict[str, int]:
+    """Byte sizes of the snapshot's components.
+
+    `scan_bytes` is what every query reads (codes, scales and norms);
+    `float_bytes` is what an unquantized scan would read instead.
+    """
+    codes = self.count * self.dimension
+    floats = codes * 4
+    side = self.scales.nbytes + self.norms.nbytes
+    return {
+      "vectors": self.count,
+      "dimension": self.dimension,
+      "scan_bytes": codes + side,
+      "float_bytes": floats + self.norms.nbytes,
+      "offsets_bytes": self.offsets.nbytes,
+      "records_bytes": len(self._records),
+      "disk_bytes": sum(file.stat().st_size for file in self.path.iterdir()),
+    }
+
+
+_snapshot_lock = threading.Lock()
+_snapshot: VectorSnapshot | None = None
+# (path, `CURRENT` mtime) the loaded snapshot corresponds to; mtime is None
+# while no snapshot exists
+_snapshot_key: tuple[str, int | None] | None = None
+
+
+def _load_snapshot(path: Path) -> VectorSnapshot:
+  settings = get_settings()
+  snapshot = VectorSnapshot(path)
+  if snapshot.manifest["embeddings_model"] != settings.openai_embeddings_model_name:
+    logger.warning(
+      "Vector snapshot at %s was built with %s but queries use %s.",
+      path,
+      snapshot.manifest["embeddings_model"],
+      settings.openai_embeddings_model_name,
+    )
+  return snapshot
+
+
+def _published_mtime(path: Path) -> int | None:
+  """Modification time of the file that changes with every export."""
+  for name in (_CURRENT_FILE, _MANIFEST_FILE):
+    try:
+      return (path / name).stat().st_mtime_ns
+    except FileNotFoundError:
+      continue
+  return None
+
+
+def _refresh() -> bool:
+  """Load a new export if one was published; the caller holds `_snapshot_lock`.
+
+  Returns:
+    Whether the served snapshot changed.
+  """
+  global _snapshot, _snapshot_key
+  path = Path(get_settings().snapshot_path)
+  mtime = _published_mtime(path)
+  key = (str(path), mtime)
+  if key == _snapshot_key:
+    return False
+
+  if mtime is None:
+    logger.warning("No vector snapshot at %s; retrieval falls back to Pinecone.", path)
+    snapshot = None
+  else:
+    try:
+      snapshot = _load_snapshot(path)
+    except (OSError, ValueError, KeyError):
+      # An export may be removing the version just published; retry next call
+      logger.warning("Could not load the vector snapshot at %s.", path, exc_info=True)
+      return False
+    logger.info("Loaded vector snapshot at %s (%d vectors).", snapshot.path, snapshot.count)
+
+  previous = _snapshot
+  _snapshot, _snapshot_key = snapshot, key
+  # Queries still using the old snapshot close it when they finish
+  if previous is not None and previous._users == 0:
+    previous.close()
+  return previous is not None or snapshot is not None
+
+
+def get_snapshot() -> VectorSnapshot | None:
+  """Get the snapshot at `snapshot_path`, or None if none has been exported.
+
+  `CURRENT` is checked on every call, so a new export (e.g. from the CLI
+  while the API is running) is picked up without a restart. Whenever the
+  served snapshot changes, the previous one is closed and the retrieval
+  cache's corpus version is bumped so results from the old snapshot are
+  dropped. Use `use_snapshot` to query the snapshot.
+  """
+  with _snapshot_lock:
+    changed = _refresh()
+    snapshot = _snapshot
+  if changed:
+    get_retrieval_cache().bump_corpus_version()
+  return snapshot
+
+
+@contextmanager
+def use_snapshot() -> Iterator[VectorSnapshot | None]:
+  """Like `get_snapshot`, but keeps the snapshot open for the block.
+
+  A snapshot replaced by a new export while the block runs is closed when
+  the block exits instead of under the running query.
+  """
+  with _snapshot_lock:
+    changed = _refresh()
+    snapshot = _snapshot
+    if snapshot is not None:
+      snapshot._users += 1
+  if changed:
+    get_retrieval_cache().bump_corpus_version()
+
+  try:
+    yield snapshot
+  finally:
+    if snapshot is not None:
+      with _snapshot_lock:
+        snapshot._users -= 1
+        if snapshot is not _snapshot and snapshot._users == 0:
+          snapshot.close()
@@ -1,39 +1,345 @@
 """Vector store wrapper for Pinecone integration with LangChain."""
 
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
 from pathlib import Path
 from functools import lru_cache
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Dict, List, Sequence, Tuple
 
 from pinecone import Pinecone
 from langchain_core.documents import Document
 from langchain_pinecone import PineconeVectorStore
 from langchain_openai import OpenAIEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
 
 from ...core.config import get_settings
+from ..chunking import chunk_pdf
+from ..llm import LLMCacheMiss, get_response_cache
+from ..sessions import Session, current_session
+from ..tracing import trace_event, trace_span
+from .cache import get_retrieval_cache, normalize_query
+from .depth import choose_k
+from .mmr import maximal_marginal_relevance
+from .options import RetrievalOptions
+from .serialization import chunk_id
+from .snapshot import get_snapshot, use_snapshot, write_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Metadata key under which PineconeVectorStore stores chunk text
+_TEXT_KEY = "text"
 
 
 @lru_cache(maxsize=1)
-def _get_vector_store() -> PineconeVectorStore:
-  """Create a PineconeVectorStore instance configured from settings."""
+def _get_index():
+  """Create a Pinecone index client configured from settings."""
   settings = get_settings()
 
   pc = Pinecone(api_key=settings.pinecone_api_key)
-  index = pc.Index(settings.pinecone_index_name)
+  return pc.Index(settings.pinecone_index_name)
 
-  embeddings = OpenAIEmbeddings(
+
+@lru_cache(maxsize=1)
+def get_embeddings() -> OpenAIEmbeddings:
+  """Create the OpenAI embeddings client configured from settings."""
+  settings = get_settings()
+
+  return OpenAIEmbeddings(
     model=settings.openai_embeddings_model_name,
     api_key=settings.openai_api_key,
   )
 
+
+@lru_cache(maxsize=1)
+def _get_vector_store() -> PineconeVectorStore:
+  """Create a PineconeVectorStore instance configured from settings."""
   return PineconeVectorStore(
-    index=index,
-    embedding=embeddings,
+    index=_get_index(),
+    embedding=get_embeddings(),
+    text_key=_TEXT_KEY,
+  )
+
+
+@dataclass(frozen=True)
+class _SearchParams:
+  """Fully resolved search parameters for a single retrieval."""
+
+  k: int
+  fetch_k: int
+  lambda_mult: float
+  adaptive: bool
+  min_k: int
+  max_k: int
+  score_threshold: float | None
+  score_gap: float | None
+
+  @property
+  def top_k(self) -> int:
+    """Number of candidates to request from the index."""
+    return max(self.fetch_k, self.max_k if self.adaptive else self.k)
+
+  def cache_variant(self) -> Tuple:
+    """Ranking parameters that must be part of the cache key besides `k`."""
+    return (self.fetch_k, self.lambda_mult, self.adaptive, self.min_k, self.max_k,
+            self.score_threshold, self.score_gap)
+
+
+def _resolve_search_params(
+  k: int | None, options: RetrievalOptions | None
+) -> _SearchParams:
+  """Fill unset search parameters from request options, then settings."""
+  settings = get_settings()
+  options = options or RetrievalOptions()
+
+  def _pick(value, default):
+    return value if value is not None else default
+
+  k = _pick(k, _pick(options.k, settings.retrieval_k))
+  min_k = _pick(options.min_k, settings.retrieval_min_k)
+  max_k = max(_pick(options.max_k, settings.retrieval_max_k), min_k)
+  return _SearchParams(
+    k=k,
+    fetch_k=_pick(options.fetch_k, settings.retrieval_fetch_k),
+    lambda_mult=_pick(options.lambda_mult, settings.retrieval_mmr_lambda),
+    adaptive=_pick(options.adaptive, settings.retrieval_adaptive),
+    min_k=min_k,
+    max_k=max_k,
+    score_threshold=_pick(options.score_threshold, settings.retrieval_score_threshold),
+    score_gap=_pick(options.score_gap, settings.retrieval_score_gap),
+  )
+
+
+def _match_to_document(match) -> Document:
+  """Convert a Pinecone query match into a LangChain Document."""
+  metadata = dict(match.metadata or {})
+  text = metadata.pop(_TEXT_KEY, "")
+  return Document(id=match.id, page_content=text, metadata=metadata)
+
+
+def _query_index(
+  vector: List[float],
+  top_k: int,
+  include_values: bool,
+  namespace: str | None = None,
+) -> list:
+  """Find the `top_k` nearest chunks, from the local snapshot or Pinecone.
+
+  The snapshot serves the query when `retrieval_backend` is "snapshot" and a
+  snapshot of the requested namespace has been exported; otherwise the query
+  goes to Pinecone. Both return matches with `id`, `score`, `metadata` and
+  (optionally) `values`.
+  """
+  if get_settings().retrieval_backend == "snapshot":
+    with use_snapshot() as snapshot:
+      if snapshot is not None and snapshot.namespace == (namespace or ""):
+        with trace_span("snapshot_query", "vector_search", top_k=top_k):
+          return snapshot.query(vector, top_k, include_values=include_values)
+
+  with trace_span("pinecone_query", "vector_search", top_k=top_k):
+    response = _get_index().query(
+      vector=vector,
+      top_k=top_k,
+      include_values=include_values,
+      include_metadata=True,
+      namespace=namespace,
+    )
+  return response.matches
+
+
+def current_corpus_version() -> int:
+  """Return the retrieval cache's corpus version, after checking for a new snapshot.
+
+  With the snapshot backend, a new export is loaded here (bumping the
+  version) before the version is read, so callers never pair cached
+  results or finished runs with a snapshot that has since been replaced.
+  """
+  if get_settings().retrieval_backend == "snapshot":
+    get_snapshot()
+  return get_retrieval_cache().corpus_version
+
+
+def _embed(queries: List[str]) -> List[List[float]]:
+  """Embed queries in a single request, recording it as a trace span."""
+  with trace_span("embed", "embedding", texts=len(queries)):
+    if len(queries) == 1:
+      return [get_embeddings().embed_query(queries[0])]
+    return get_embeddings().embed_documents(queries)
+
+
+def _rank_candidates(
+  query: str,
+  vector: List[float],
+  candidates: List[Tuple[Document, float]],
+  candidate_vectors: List[List[float]] | None,
+  params: _SearchParams,
+) -> List[int]:
+  """Pick which relevance-sorted candidates to return, by index.
+
+  In adaptive mode the number of results is chosen from the candidate scores
+  (see `choose_k`) and the decision is logged. Only candidates before the
+  score threshold / gap cut-off are eligible, so MMR cannot swap in less
+  relevant chunks from below it. When there are more eligible candidates
+  than results and their vectors are known, a diverse subset is picked with
+  MMR, so nearly duplicate neighbouring chunks do not crowd out distinct
+  information.
+  """
+  k = params.k
+  pool = len(candidates)
+  if params.adaptive:
+    # Cut-off without the max_k cap: the pool MMR may choose from
+    pool, reason = choose_k(
+      [score for _doc, score in candidates],
+      params.min_k,
+      len(candidates),
+      params.score_threshold,
+      params.score_gap,
+    )
+    k = min(pool, params.max_k)
+    if k < pool:
+      reason = "max_k"
+    elif reason == "max_k":
+      reason = "exhausted"
+    logger.info(
+      "adaptive retrieval k=%d reason=%s top_score=%s candidates=%d query=%r",
+      k,
+      reason,
+      f"{candidates[0][1]:.4f}" if candidates else None,
+      len(candidates),
+      query,
+    )
+
+  if candidate_vectors is None or pool <= k:
+    return list(range(min(k, pool)))
+
+  return maximal_marginal_relevance(vector, candidate_vectors[:pool], k, params.lambda_mult)
+
+
+def _search_by_vector(
+  query: str,
+  vector: List[float],
+  params: _SearchParams,
+  namespace: str | None = None,
+  values_out: Dict[str, List[float]] | None = None,
+  include_values: bool = False,
+) -> List[Tuple[Document, float]]:
+  """Search with an embedding, re-ranking locally with MMR if over-fetching.
+
+  Embeddings are fetched only if MMR may need them or `include_values` is
+  set. When fetched, those of the returned chunks are stored by Document id
+  in `values_out` (if given).
+  """
+  top_k = params.top_k
+  # Vectors are only needed if MMR may have to choose among extra candidates
+  may_rerank = top_k > (params.min_k if params.adaptive else params.k)
+  with_values = may_rerank or include_values
+  matches = _query_index(vector, top_k, with_values, namespace)
+  candidates = [(_match_to_document(match), float(match.score)) for match in matches]
+
+  selected = _rank_candidates(
+    query, vector, candidates, [match.values for match in matches] if may_rerank else None, params
+  )
+  if values_out is not None and with_values:
+    values_out.update({matches[index].id: matches[index].values for index in selected})
+  return [candidates[index] for index in selected]
+
+
+def _add_to_session(
+  session: Session,
+  results: List[Tuple[Document, float]],
+  vectors: Dict[str, List[float]],
+  corpus_version: int,
+) -> None:
+  """Remember retrieved chunks whose embeddings are known in the session."""
+  session.add_chunks(
+    [(chunk_id(doc), doc, vectors[doc.id]) for doc, _score in results if doc.id in vectors],
+    corpus_version,
   )
 
 
+def _merge_session_chunks(
+  session: Session,
+  query: str,
+  vector: List[float],
+  results: List[Tuple[Document, float]],
+  vectors: Dict[str, Sequence[float]],
+  params: _SearchParams,
+  corpus_version: int,
+) -> List[Tuple[Document, float]]:
+  """Rank index results together with the session's matching chunks.
+
+  Session chunks scoring at least `session_match_threshold` join the index
+  results as extra candidates and all of them are ranked like Pinecone
+  candidates. A follow-up thus keeps the earlier turns' chunks it still
+  relates to, while a question on a new topic is answered from the index.
+  """
+  threshold = get_settings().session_match_threshold
+  with trace_span("session_search", "vector_search", chunks=len(session)) as span:
+    seen = {chunk_id(doc) for doc, _score in results}
+    extra = [
+      (doc, score, chunk_vector)
+      for doc, score, chunk_vector in session.search(vector, corpus_version)
+      if score >= threshold and chunk_id(doc) not in seen
+    ][:params.top_k]
+    span.set(matches=len(extra))
+    if not extra:
+      return results
+
+    candidates = sorted(
+      [(doc, score, vectors.get(doc.id)) for doc, score in results] + extra,
+      key=lambda candidate: candidate[1],
+      reverse=True,
+    )
+    candidate_vectors = [chunk_vector for _doc, _score, chunk_vector in candidates]
+    selected = _rank_candidates(
+      query,
+      vector,
+      [(doc, score) for doc, score, _vector in candidates],
+      candidate_vectors if all(chunk_vector is not None for chunk_vector in candidate_vectors) else None,
+      params,
+    )
+    return [candidates[index][:2] for index in selected]
+
+
+def _cassette_key(cache_key: Tuple) -> str:
+  """Hash a retrieval cache key into a stable cassette key."""
+  serialized = json.dumps(cache_key, default=str)
+  return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def _replayed_results(cache_key: Tuple) -> List[Tuple[Document, float]] | None:
+  """Serve retrieval results from the cassette in `replay` mode.
+
+  Returns None outside replay mode; raises `LLMCacheMiss` on a replay miss so
+  offline runs never reach OpenAI embeddings or Pinecone.
+  """
+  if get_settings().llm_cache_mode != "replay":
+    return None
+
+  key = _cassette_key(cache_key)
+  payload = get_response_cache().lookup("retrieval", key)
+  if payload is None:
+    raise LLMCacheMiss(f"No recorded retrieval for query hash {key[:12]}.")
+  return [
+    (Document(id=item["id"], page_content=item["text"], metadata=item["metadata"]), item["score"])
+    for item in payload
+  ]
+
+
+def _record_results(cache_key: Tuple, results: List[Tuple[Document, float]]) -> None:
+  """Write retrieval results to the cassette in `record` mode."""
+  if get_settings().llm_cache_mode != "record":
+    return
+
+  payload = [
+    {"id": doc.id, "text": doc.page_content, "metadata": doc.metadata, "score": score}
+    for doc, score in results
+  ]
+  get_response_cache().store("retrieval", _cassette_key(cache_key), payload, evict=False)
+
+
 def get_retriever(k: int | None = None):
   """Get a Pinecone retriever instance.
 
@@ -51,35 +357,201 @@ def get_retriever(k: int | None = None):
   return vector_store.as_retriever(search_kwargs={"k": k})
 
 
-def retrieve(query: str, k: int | None = None) -> List[Document]:
+def retrieve(
+  query: str,
+  k: int | None = None,
+  namespace: str | None = None,
+  options: RetrievalOptions | None = None,
+) -> List[Tuple[Document, float]]:
   """Retrieve documents from Pinecone for a given query.
 
+  Over-fetches candidates and re-ranks them locally with maximal marginal
+  relevance to return a diverse top-`k`; in adaptive mode `k` is chosen per
+  query from the similarity scores. Results are served from the in-process
+  retrieval cache when the same normalized query was answered recently
+  against the current corpus version. Within a session (see
+  `current_session`), chunks already retrieved for earlier turns that match
+  the query are ranked together with the index results, and the index
+  results are then added to the session.
+
   Args:
     query: Search query string.
-    k: Number of documents to retrieve (defaults to config value).
+    k: Number of documents to retrieve (defaults to `options.k`, then the
+      config value).
+    namespace: Optional Pinecone namespace to search (also the cache scope).
+    options: Optional per-request overrides (MMR and adaptive depth settings).
+
+  Returns:
+    List of (Document, similarity score) tuples, best match first. Documents
+    carry their Pinecone id and metadata (including page numbers).
+  """
+  params = _resolve_search_params(k, options)
+
+  with trace_span("retrieve", "retrieval", query=query) as span:
+    corpus_version = current_corpus_version()
+    cache = get_retrieval_cache()
+
+    # Replay runs skip sessions so they never need a live embeddings call
+    session = current_session.get() if namespace is None else None
+    if session is not None and get_settings().llm_cache_mode == "replay":
+      session = None
+
+    cache_key = cache.make_key(query, params.k, namespace, params.cache_variant())
+    results = cache.get(cache_key)
+    vector = None
+    values: Dict[str, Sequence[float]] = {}
+    if results is not None:
+      span.set(cache="hit")
+      if session is not None:
+        values = cache.vectors(results)
+    else:
+      results = _replayed_results(cache_key)
+      span.set(cache="miss" if results is None else "replay")
+      if results is None:
+        vector = _embed([query])[0]
+        # Sessions need the embeddings of the results; they are cached along
+        # with them so later cache hits can seed a session too
+        results = _search_by_vector(
+          query, vector, params, namespace, values, include_values=session is not None
+        )
+        _record_results(cache_key, results)
+      cache.put(cache_key, results, corpus_version, values)
+
+    if session is not None:
+      vector = vector if vector is not None else _embed([query])[0]
+      index_results = results
+      results = _merge_session_chunks(session, query, vector, results, values, params, corpus_version)
+      _add_to_session(session, index_results, values, corpus_version)
+    span.set(results=len(results))
+    return results
+
+
+def retrieve_many(
+  queries: List[str],
+  k: int | None = None,
+  max_workers: int = 4,
+  namespace: str | None = None,
+  options: RetrievalOptions | None = None,
+) -> Dict[str, List[Tuple[Document, float]]]:
+  """Retrieve documents for many queries with shared embedding work.
+
+  Queries are deduplicated after normalization and looked up in the
+  retrieval cache. The remaining misses are embedded in a single batched
+  embeddings request and then searched against Pinecone in parallel.
+
+  Args:
+    queries: Search query strings (duplicates are allowed).
+    k: Number of documents to retrieve per query (defaults to `options.k`,
+      then the config value).
+    max_workers: Maximum number of concurrent Pinecone queries.
+    namespace: Optional Pinecone namespace to search (also the cache scope).
+    options: Optional per-request overrides (MMR and adaptive depth settings).
 
   Returns:
-    List of Document objects with metadata (including page numbers).
+    Mapping of every input query to its (Document, score) tuples.
   """
+  params = _resolve_search_params(k, options)
+
+  unique_queries: Dict[str, str] = {}
+  for query in queries:
+    unique_queries.setdefault(normalize_query(query), query)
+
+  if not unique_queries:
+    return {}
+
+  corpus_version = current_corpus_version()
+  cache = get_retrieval_cache()
+  variant = params.cache_variant()
+  results_by_key: Dict[str, List[Tuple[Document, float]]] = {}
+  missing: Dict[str, str] = {}
+  for key, query in unique_queries.items():
+    cache_key = cache.make_key(query, params.k, namespace, variant)
+    cached = cache.get(cache_key)
+    hit = "hit"
+    if cached is None:
+      cached = _replayed_results(cache_key)
+      hit = "replay"
+    if cached is not None:
+      trace_event("retrieve", "retrieval", query=query, cache=hit, results=len(cached))
+      results_by_key[key] = cached
+    else:
+      missing[key] = query
 
-  retriever = get_retriever(k=k)
-  return retriever.invoke(query)
+  if missing:
+    vectors = _embed(list(missing.values()))
 
-def index_documents(file_path: Path) -> int:
-  """Index a list of Document objects into the Pinecone vector store.
+    def _search(query: str, vector: List[float]) -> Tuple[List[Tuple[Document, float]], Dict[str, List[float]]]:
+      values: Dict[str, List[float]] = {}
+      with trace_span("retrieve", "retrieval", query=query, cache="miss"):
+        return _search_by_vector(query, vector, params, namespace, values), values
+
+    # Submit with a copy of the context so searches are recorded in the request trace
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+      futures = [
+        executor.submit(copy_context().run, _search, query, vector)
+        for query, vector in zip(missing.values(), vectors)
+      ]
+      docs_per_query = [future.result() for future in futures]
+
+    for (key, query), (results, values) in zip(missing.items(), docs_per_query):
+      cache_key = cache.make_key(query, params.k, namespace, variant)
+      _record_results(cache_key, results)
+      cache.put(cache_key, results, corpus_version, values)
+      results_by_key[key] = results
+
+  return {query: results_by_key[normalize_query(query)] for query in queries}
+
+
+def index_documents(file_path: Path, strategy: str | None = None) -> int:
+  """Chunk a PDF and index the chunks into the Pinecone vector store.
 
   Args:
-    docs: Documents to embed and upsert into the vector index.
+    file_path: Path to the PDF file on disk.
+    strategy: Chunking strategy name (defaults to `chunking_strategy` from
+      settings). See `CHUNKING_STRATEGIES`.
 
   Returns:
     The number of documents indexed.
   """
-  loader = PyPDFLoader(str(file_path), mode="single")
-  docs = loader.load()
+  return len(index_chunks(chunk_pdf(file_path, strategy)))
+
 
-  text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-  texts = text_splitter.split_documents(docs)
+def index_chunks(chunks: List[Document]) -> List[Document]:
+  """Index already chunked Documents into the Pinecone vector store.
 
+  Returns:
+    The indexed chunks, for post-indexing stages (e.g. FAQ generation).
+  """
   vector_store = _get_vector_store()
-  vector_store.add_documents(texts)
-  return len(texts)
\ No newline at end of file
+  vector_store.add_documents(chunks)
+
+  # The corpus changed, so cached retrieval results are stale
+  get_retrieval_cache().bump_corpus_version()
+  if get_settings().retrieval_backend == "snapshot":
+    sources = sorted({chunk.metadata.get("source", "") for chunk in chunks})
+    logger.warning("Indexed %s; re-export the vector snapshot to serve the new chunks.", ", ".join(sources))
+  return chunks
+
+
+def export_snapshot(
+  path: Path | None = None, namespace: str | None = None, batch_size: int = 100
+) -> Dict:
+  """Export the vectors and metadata written by `index_documents` to a local snapshot.
+
+  Needs a serverless Pinecone index, since only those can list their ids.
+
+  Args:
+    path: Snapshot directory (defaults to `snapshot_path` from settings).
+    namespace: Pinecone namespace to export (default namespace if None).
+    batch_size: Ids listed and fetched per Pinecone request.
+
+  Returns:
+    The snapshot manifest (vector count, dimension, namespace, model).
+
+  Raises:
+    RuntimeError: If the index cannot list its ids (pod-based indexes).
+  """
+  path = Path(path or get_settings().snapshot_path)
+  # `get_snapshot` notices the new export, switches to the new snapshot
+  # and drops results cached from the old one
+  return write_snapshot(_get_index(), path, namespace, batch_size)
\ No newline at end of file
@@ -0,0 +1,5 @@
+"""Conversation sessions: per-session chunk store and prior turns."""
+
+from .store import Session, SessionStore, current_session, get_session_store
+
+__all__ = ["Session", "SessionStore", "current_session", "get_session_store"]
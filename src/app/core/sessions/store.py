@@ -0,0 +1,206 @@
+"""Bounded in-process store of conversation sessions.
+
+A session remembers the chunks retrieved for its recent questions (with
+their embeddings) and its prior turns. Follow-up questions rank the
+session's matching chunks together with the Pinecone results, and the planner and
+summarizer see the recent turns so that "what about its memory cost?" can
+be resolved.
+
+Memory is bounded per session (`session_max_chunks`, `session_max_turns`,
+least recently retrieved chunks are dropped first) and across sessions
+(`session_max_sessions`, least recently used sessions are dropped first).
+Sessions idle for longer than `session_idle_ttl_seconds` expire.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from ..config import get_settings
+
+# Characters of each prior answer shown to the planner and summarizer
+_HISTORY_ANSWER_CHARS = 600
+
+
+@dataclass
+class _SessionChunk:
+  document: Document
+  vector: np.ndarray
+
+
+class Session:
+  """Chunks and turns of one conversation."""
+
+  def __init__(self, session_id: str, max_chunks: int, max_turns: int) -> None:
+    self.id = session_id
+    self.max_chunks = max_chunks
+    self.last_used = time.monotonic()
+    self.corpus_version: int | None = None
+    self._chunks: "OrderedDict[str, _SessionChunk]" = OrderedDict()
+    self._turns: deque = deque(maxlen=max_turns)
+    self._lock = threading.Lock()
+
+  @property
+  def turn_count(self) -> int:
+    with self._lock:
+      return len(self._turns)
+
+  def add_chunks(self, results: Sequence[Tuple[str, Document, Sequence[float]]], corpus_version: int) -> None:
+    """Remember retrieved chunks as (chunk id, Document, embedding) triples."""
+    with self._lock:
+      self._check_corpus(corpus_version)
+      for chunk_id, document, vector in results:
+        vector = np.asarray(vector, dtype=np.float32)
+        self._chunks[chunk_id] = _SessionChunk(document, vector / max(float(np.linalg.norm(vector)), 1e-12))
+        self._chunks.move_to_end(chunk_id)
+      while len(self._chunks) > self.max_chunks:
+        self._chunks.popitem(last=False)
+
+  def search(self, vector: Sequence[float], corpus_version: int) -> List[Tuple[Document, float, np.ndarray]]:
+    """Score every session chunk against a query embedding, best first.
+
+    Returns:
+      (Document, cosine score, unit embedding) triples.
+    """
+    query = np.asarray(vector, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+    with self._lock:
+      self._check_corpus(corpus_version)
+      if not self._chunks:
+        return []
+      chunks = list(self._chunks.values())
+
+    vectors = np.stack([chunk.vector for chunk in chunks])
+    scores = vectors @ query
+    order = np.argsort(-scores)
+    return [(chunks[i].document, float(scores[i]), vectors[i]) for i in order]
+
+  def add_turn(self, question: str, answer: str) -> None:
+    with self._lock:
+      self._turns.append((question, answer))
+
+  def history(self, turns: int) -> str | None:
+    """Render the last `turns` question/answer pairs, or None for a new session."""
+    with self._lock:
+      recent = list(self._turns)[-turns:] if turns > 0 else []
+    if not recent:
+      return None
+    lines = []
+    for question, answer in recent:
+      if len(answer) > _HISTORY_ANSWER_CHARS:
+        answer = answer[:_HISTORY_ANSWER_CHARS].rstrip() + "..."
+      lines.append(f"User: {question}\nAssistant: {answer}")
+    return "\n\n".join(lines)
+
+  def nbytes(self) -> int:
+    """Approximate memory held by the session's chunks."""
+    with self._lock:
+      return sum(
+        chunk.vector.nbytes + len(chunk.document.page_content.encode("utf-8"))
+        for chunk in self._chunks.values()
+      )
+
+  def _check_corpus(self, corpus_version: int) -> None:
+    """Forget chunks retrieved before the corpus changed (lock must be held)."""
+    if self.corpus_version != corpus_version:
+      self._chunks.clear()
+      self.corpus_version = corpus_version
+
+  def __len__(self) -> int:
+    with self._lock:
+      return len(self._chunks)
+
+
+class SessionStore:
+  """Thread-safe LRU store of sessions with idle expiry."""
+
+  def __init__(
+    self,
+    max_sessions: int = 256,
+    max_chunks: int = 128,
+    max_turns: int = 10,
+    idle_ttl_seconds: float = 1800.0,
+  ) -> None:
+    self.max_sessions = max_sessions
+    self.max_chunks = max_chunks
+    self.max_turns = max_turns
+    self.idle_ttl_seconds = idle_ttl_seconds
+    self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+    self._lock = threading.Lock()
+
+    self.created = 0
+    self.evictions = 0
+    self.expirations = 0
+
+  def get(self, session_id: str) -> Session:
+    """Return the session with this id, creating it if needed."""
+    now = time.monotonic()
+    with self._lock:
+      self._expire(now)
+      session = self._sessions.get(session_id)
+      if session is None:
+        session = Session(session_id, self.max_chunks, self.max_turns)
+        self._sessions[session_id] = session
+        self.created += 1
+        while len(self._sessions) > self.max_sessions:
+          self._sessions.popitem(last=False)
+          self.evictions += 1
+      self._sessions.move_to_end(session_id)
+      session.last_used = now
+      return session
+
+  def delete(self, session_id: str) -> bool:
+    with self._lock:
+      return self._sessions.pop(session_id, None) is not None
+
+  def stats(self) -> Dict[str, Any]:
+    with self._lock:
+      self._expire(time.monotonic())
+      sessions = list(self._sessions.values())
+      counters = {
+        "created": self.created,
+        "evictions": self.evictions,
+        "expirations": self.expirations,
+      }
+    return {
+      "sessions": len(sessions),
+      "max_sessions": self.max_sessions,
+      "max_chunks_per_session": self.max_chunks,
+      "idle_ttl_seconds": self.idle_ttl_seconds,
+      "chunks": sum(len(session) for session in sessions),
+      "approx_bytes": sum(session.nbytes() for session in sessions),
+      **counters,
+    }
+
+  def _expire(self, now: float) -> None:
+    """Drop idle sessions (lock must be held). Sessions are kept in LRU order."""
+    while self._sessions:
+      oldest = next(iter(self._sessions.values()))
+      if now - oldest.last_used <= self.idle_ttl_seconds:
+        break
+      self._sessions.popitem(last=False)
+      self.expirations += 1
+
+
+# Session of the request currently being processed. Set by the QA service and
+# read by `retrieve()`, which runs inside the retrieval tool.
+current_session: ContextVar[Session | None] = ContextVar("current_session", default=None)
+
+
+@lru_cache(maxsize=1)
+def get_session_store() -> SessionStore:
+  """Get the process-wide session store configured from settings."""
+  settings = get_settings()
+  return SessionStore(
+    max_sessions=settings.session_max_sessions,
+    max_chunks=settings.session_max_chunks,
+    max_turns=settings.session_max_turns,
+    idle_ttl_seconds=settings.session_idle_ttl_seconds,
+  )
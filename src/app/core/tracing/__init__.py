@@ -0,0 +1,6 @@
+"""Request tracing: timing waterfalls and optional sampling profiles."""
+
+from .waterfall import Span, Trace, current_trace, request_trace, trace_event, trace_span, traced
+from .profiler import profile_request, should_profile
+
+__all__ = ["Span", "Trace", "current_trace", "request_trace", "trace_event", "trace_span", "traced", "profile_request", "should_profile"]
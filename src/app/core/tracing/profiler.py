@@ -0,0 +1,78 @@
+"""Optional sampling profiler for individual requests.
+
+Profiles are recorded with pyinstrument, which is an optional dependency
+(`uv sync --extra profiling`). A request is profiled when it asks for it or
+when it falls into the `profiling_sample_rate` share of traffic; each
+profile is written as an HTML report to `profiling_dir`.
+
+pyinstrument samples the thread that starts it, so the profiler must be
+started in the thread that runs the graph.
+"""
+
+import logging
+import random
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+from ..config import get_settings
+from .waterfall import current_trace
+
+logger = logging.getLogger(__name__)
+
+try:
+  from pyinstrument import Profiler
+except ImportError:  # pragma: no cover - optional dependency
+  Profiler = None
+
+_warned_missing = False
+
+
+def should_profile(requested: bool = False) -> bool:
+  """Whether to profile a request: explicitly requested or sampled."""
+  rate = get_settings().profiling_sample_rate
+  return requested or (rate > 0 and random.random() < rate)
+
+
+@contextmanager
+def profile_request(label: str, enabled: bool) -> Iterator[Dict[str, Any]]:
+  """Profile the block and write an HTML report, if `enabled`.
+
+  The report's path is also attached to the active request trace, if any.
+
+  Yields:
+    Dictionary that receives the report's `profile_path` once the block exits.
+  """
+  global _warned_missing
+  info: Dict[str, Any] = {}
+  if not enabled:
+    yield info
+    return
+
+  if Profiler is None:
+    if not _warned_missing:
+      logger.warning("Request profiling requested but pyinstrument is not installed.")
+      _warned_missing = True
+    yield info
+    return
+
+  settings = get_settings()
+  profiler = Profiler(interval=settings.profiling_interval_seconds, async_mode="disabled")
+  profiler.start()
+  try:
+    yield info
+  finally:
+    profiler.stop()
+    directory = Path(settings.profiling_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = re.sub(r"[^A-Za-z0-9_.-]+", "-", label)[:64]
+    path = directory / f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}.html"
+    path.write_text(profiler.output_html())
+    info["profile_path"] = str(path)
+    trace = current_trace.get()
+    if trace is not None:
+      trace.profile_path = str(path)
+    logger.info("Wrote request profile to %s", path)
@@ -0,0 +1,175 @@
+"""Per-request timing waterfall.
+
+A `Trace` is attached to the current request through a context variable,
+like `current_retrieval_options`, so graph nodes, LLM calls, embedding and
+vector searches can record spans without receiving the trace as an
+argument. Spans nest through a second context variable holding the active
+span, and every call site is a no-op when no trace is active.
+
+Context variables do not follow work submitted to plain thread pools, so
+code that fans out to threads submits through `copy_context().run`.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List
+
+
+class Span:
+  """A timed operation in the waterfall."""
+
+  def __init__(self, trace: "Trace", span_id: int, parent: int | None, name: str, kind: str, attrs: Dict[str, Any]) -> None:
+    self.trace = trace
+    self.id = span_id
+    self.parent = parent
+    self.name = name
+    self.kind = kind
+    self.attrs = attrs
+    self.thread = threading.current_thread().name
+    self.start = time.perf_counter()
+    self.end: float | None = None
+
+  def set(self, **attrs: Any) -> None:
+    """Attach attributes such as token counts or cache results."""
+    self.attrs.update({key: value for key, value in attrs.items() if value is not None})
+
+  def to_dict(self) -> Dict[str, Any]:
+    end = self.end if self.end is not None else time.perf_counter()
+    return {
+      "id": self.id,
+      "parent": self.parent,
+      "name": self.name,
+      "kind": self.kind,
+      "start_ms": round((self.start - self.trace.start) * 1000, 2),
+      "duration_ms": round((end - self.start) * 1000, 2),
+      "thread": self.thread,
+      **self.attrs,
+    }
+
+
+class _NullSpan:
+  """Stand-in yielded by `trace_span` when no trace is active."""
+
+  def set(self, **attrs: Any) -> None:
+    pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Trace:
+  """Collects the spans recorded while answering one request."""
+
+  def __init__(self) -> None:
+    self.start = time.perf_counter()
+    self.profile_path: str | None = None
+    self._spans: List[Span] = []
+    self._lock = threading.Lock()
+
+  def open_span(self, parent: int | None, name: str, kind: str, attrs: Dict[str, Any]) -> Span:
+    with self._lock:
+      span = Span(self, len(self._spans) + 1, parent, name, kind, attrs)
+      self._spans.append(span)
+    return span
+
+  def waterfall(self) -> Dict[str, Any]:
+    """Return spans in start order plus per-request totals."""
+    with self._lock:
+      spans = [span.to_dict() for span in sorted(self._spans, key=lambda span: span.start)]
+
+    llm = [span for span in spans if span["kind"] == "llm"]
+    embeddings = [span for span in spans if span["kind"] == "embedding"]
+    retrievals = [span for span in spans if span["kind"] == "retrieval"]
+    summary = {
+      "llm_calls": len(llm),
+      "llm_cache_hits": sum(span.get("cache") == "hit" for span in llm),
+      "input_tokens": sum(span.get("input_tokens", 0) for span in llm),
+      "output_tokens": sum(span.get("output_tokens", 0) for span in llm),
+      "embedding_calls": len(embeddings),
+      "embedded_texts": sum(span.get("texts", 0) for span in embeddings),
+      "vector_searches": sum(span["kind"] == "vector_search" for span in spans),
+      "retrievals": len(retrievals),
+      "retrieval_cache_hits": sum(span.get("cache") == "hit" for span in retrievals),
+      "session_hits": sum(span.get("cache") == "session" for span in retrievals),
+      "faq_hits": sum(span["kind"] == "faq" and bool(span.get("hit")) for span in spans),
+      "ms_by_kind": {},
+    }
+    kinds = {span["id"]: span["kind"] for span in spans}
+    for span in spans:
+      # Only outermost time per kind, so nested spans are not double counted
+      if kinds.get(span["parent"]) != span["kind"]:
+        summary["ms_by_kind"][span["kind"]] = round(
+          summary["ms_by_kind"].get(span["kind"], 0.0) + span["duration_ms"], 2
+        )
+
+    waterfall = {
+      "total_ms": round((time.perf_counter() - self.start) * 1000, 2),
+      "summary": summary,
+      "spans": spans,
+    }
+    if self.profile_path is not None:
+      waterfall["profile_path"] = self.profile_path
+    return waterfall
+
+
+# Trace of the request currently being processed (None unless debugging)
+current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[int | None] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def request_trace(enabled: bool = True) -> Iterator[Trace | None]:
+  """Collect a waterfall for the code run inside the block, if `enabled`."""
+  if not enabled:
+    yield None
+    return
+
+  trace = Trace()
+  token = current_trace.set(trace)
+  try:
+    yield trace
+  finally:
+    current_trace.reset(token)
+
+
+@contextmanager
+def trace_span(name: str, kind: str, **attrs: Any) -> Iterator[Span | _NullSpan]:
+  """Time the block as a span of the current trace (no-op without one)."""
+  trace = current_trace.get()
+  if trace is None:
+    yield _NULL_SPAN
+    return
+
+  span = trace.open_span(_current_span.get(), name, kind, {k: v for k, v in attrs.items() if v is not None})
+  token = _current_span.set(span.id)
+  try:
+    yield span
+  except BaseException as exc:
+    span.set(error=type(exc).__name__)
+    raise
+  finally:
+    span.end = time.perf_counter()
+    _current_span.reset(token)
+
+
+def trace_event(name: str, kind: str, **attrs: Any) -> None:
+  """Record an instantaneous event (e.g. a checkpoint reuse) in the current trace."""
+  with trace_span(name, kind, **attrs):
+    pass
+
+
+def traced(name: str, kind: str) -> Callable:
+  """Decorator recording every call of a function as a span."""
+
+  def _decorator(func: Callable) -> Callable:
+    @wraps(func)
+    def _wrapper(*args, **kwargs):
+      with trace_span(name, kind):
+        return func(*args, **kwargs)
+
+    return _wrapper
+
+  return _decorator
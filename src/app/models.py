@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from .core.retrieval.options import RetrievalOptions
 
 
 class QuestionRequest(BaseModel):
@@ -6,9 +8,21 @@ class QuestionRequest(BaseModel):
 
   The PRD specifies a single field named `question` that contains
   the user's natural language question about the vector databases paper.
+  `retrieval` optionally overrides how many chunks are fetched and
+  re-ranked for this request. `request_id` identifies the run: retrying a
+  failed request with the same id resumes it from its last completed step
+  (by default the id is derived from the question and retrieval options).
+  `debug` returns a timing waterfall of the run; `profile` additionally
+  records a sampling profile to the server's profiling directory.
+  `session_id` groups follow-up questions into a conversation.
   """
 
   question: str
+  retrieval: RetrievalOptions | None = None
+  request_id: str | None = Field(default=None, min_length=1, max_length=128)
+  debug: bool = False
+  profile: bool = False
+  session_id: str | None = Field(default=None, min_length=1, max_length=128)
 
 
 class QAResponse(BaseModel):
@@ -16,10 +30,44 @@ class QAResponse(BaseModel):
 
   From the API consumer's perspective we expose the final verified answer,
   context snippets, and the query planning metadata (plan and sub-questions).
-  Internal draft answers remain inside the agent pipeline.
+  Internal draft answers remain inside the agent pipeline. `debug` holds
+  the timing waterfall when the request asked for it. `faq` is set when the
+  answer was precomputed for a similar question (matched question, score).
   """
 
   answer: str
   context: str
   plan: str | None = None
-  sub_questions: list[str] | None = None
\ No newline at end of file
+  sub_questions: list[str] | None = None
+  request_id: str | None = None
+  session_id: str | None = None
+  faq: dict | None = None
+  debug: dict | None = None
+
+class BatchQuestionRequest(BaseModel):
+  """Request body for the `/qa/batch` endpoint.
+
+  Contains the list of questions to answer and an optional cap on how many
+  QA pipelines may run concurrently for this batch.
+  """
+
+  questions: list[str]
+  max_concurrency: int | None = None
+  retrieval: RetrievalOptions | None = None
+
+
+class BatchQAResult(BaseModel):
+  """A single NDJSON line streamed back by the `/qa/batch` endpoint.
+
+  `index` refers to the position of the question in the request. Successful
+  results carry the same fields as `QAResponse`; failed ones carry `error`.
+  """
+
+  index: int
+  question: str
+  answer: str | None = None
+  context: str | None = None
+  plan: str | None = None
+  sub_questions: list[str] | None = None
+  request_id: str | None = None
+  error: str | None = None
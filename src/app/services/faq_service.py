@@ -0,0 +1,205 @@
+"""Background FAQ generation after indexing and serving from the FAQ index.
+
+After a PDF is indexed, a single background worker generates the questions
+users are most likely to ask about each section, answers them with the
+regular QA graph and stores the answers in the local FAQ index. `/qa`
+then serves a new question from the index when its embedding is close
+enough to a stored question.
+
+The worker runs at low priority: it handles one question at a time, waits
+while any foreground QA request is in flight and pauses between questions,
+so it only uses capacity that user requests leave idle.
+"""
+
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List
+
+from langchain_core.documents import Document
+
+from ..core.agents import run_qa_flow
+from ..core.config import get_settings
+from ..core.faq import FAQEntry, generate_questions, get_faq_index, group_sections
+from ..core.retrieval import get_embeddings
+from ..core.tracing import trace_span
+
+logger = logging.getLogger(__name__)
+
+# Foreground QA requests currently running; the builder waits while any are
+_foreground = threading.Condition()
+_foreground_requests = 0
+
+@contextmanager
+def foreground_request() -> Iterator[None]:
+  """Mark a user-facing QA request as running for the duration of the block."""
+  global _foreground_requests
+  with _foreground:
+    _foreground_requests += 1
+  try:
+    yield
+  finally:
+    with _foreground:
+      _foreground_requests -= 1
+      _foreground.notify_all()
+
+def _wait_for_idle() -> None:
+  """Block until no foreground request is running."""
+  with _foreground:
+    _foreground.wait_for(lambda: _foreground_requests == 0)
+
+def _embed_question(question: str) -> List[float]:
+  with trace_span("embed", "embedding", texts=1):
+    return get_embeddings().embed_query(question)
+
+class FAQBuilder:
+  """Single background worker that precomputes FAQ answers per indexed file."""
+
+  def __init__(self) -> None:
+    self._jobs: "queue.Queue[List[Document]]" = queue.Queue()
+    self._thread: threading.Thread | None = None
+    self._lock = threading.Lock()
+
+    self.current_source: str | None = None
+    self.generated = 0
+    self.answered = 0
+    self.duplicates = 0
+    self.failed = 0
+
+  def submit(self, chunks: List[Document]) -> None:
+    """Queue the chunks of one indexed file for FAQ generation."""
+    if not chunks:
+      return
+    self._jobs.put(chunks)
+    with self._lock:
+      if self._thread is None:
+        self._thread = threading.Thread(target=self._run, name="faq-builder", daemon=True)
+        self._thread.start()
+
+  def _run(self) -> None:
+    while True:
+      chunks = self._jobs.get()
+      try:
+        self._build(chunks)
+      except Exception:
+        logger.exception("FAQ generation failed for %s.", chunks[0].metadata.get("source", ""))
+      finally:
+        self.current_source = None
+        self._jobs.task_done()
+
+  def _build(self, chunks: List[Document]) -> None:
+    settings = get_settings()
+    index = get_faq_index()
+    source = chunks[0].metadata.get("source", "")
+    self.current_source = source
+
+    # Answers generated from an earlier version of the file are stale
+    index.delete_source(source)
+
+    for section in group_sections(chunks, settings.faq_max_section_chars):
+      _wait_for_idle()
+      try:
+        questions = generate_questions(section, settings.faq_questions_per_section)
+      except Exception:
+        logger.exception("Question generation failed for section %r of %s.", section.title, source)
+        self.failed += 1
+        continue
+      self.generated += len(questions)
+
+      for question in questions:
+        _wait_for_idle()
+        try:
+          vector = _embed_question(question)
+          # A close paraphrase is already answered (e.g. from an earlier section)
+          if index.match(vector, settings.faq_match_threshold, count=False) is not None:
+            self.duplicates += 1
+            continue
+
+          result = run_qa_flow(question)
+        except Exception:
+          logger.exception("FAQ answer failed for %r.", question)
+          self.failed += 1
+          continue
+
+        if result.get("answer"):
+          index.add(
+            FAQEntry(
+              question=question,
+              answer=result["answer"],
+              context=result.get("context", ""),
+              plan=result.get("plan"),
+              sub_questions=result.get("sub_questions"),
+              source=source,
+              section=section.title,
+            ),
+            vector,
+          )
+          self.answered += 1
+        time.sleep(settings.faq_pause_seconds)
+
+  def stats(self) -> Dict[str, Any]:
+    return {
+      "pending_files": self._jobs.unfinished_tasks,
+      "current_source": self.current_source,
+      "questions_generated": self.generated,
+      "questions_answered": self.answered,
+      "duplicates_skipped": self.duplicates,
+      "failures": self.failed,
+    }
+
+@lru_cache(maxsize=1)
+def get_faq_builder() -> FAQBuilder:
+  """Get the process-wide FAQ builder."""
+  return FAQBuilder()
+
+def schedule_faq(chunks: List[Document]) -> bool:
+  """Queue FAQ generation for freshly indexed chunks if `faq_enabled` is set.
+
+  Returns:
+    Whether generation was scheduled.
+  """
+  if not get_settings().faq_enabled or not chunks:
+    return False
+  get_faq_builder().submit(chunks)
+  return True
+
+def match_faq(question: str) -> Dict[str, Any] | None:
+  """Return a precomputed answer for a question close enough to an FAQ entry.
+
+  Args:
+    question: The user's question.
+
+  Returns:
+    A QA result dictionary (`answer`, `context`, `plan`, `sub_questions`)
+    plus an `faq` key with the matched question and its similarity, or None
+    if FAQ serving is off, the index is empty or nothing is close enough.
+  """
+  settings = get_settings()
+  if not settings.faq_enabled:
+    return None
+  index = get_faq_index()
+  if not len(index):
+    return None
+
+  with trace_span("faq_lookup", "faq") as span:
+    match = index.match(_embed_question(question), settings.faq_match_threshold)
+    span.set(hit=match is not None, score=round(match.score, 4) if match else None)
+  if match is None:
+    return None
+
+  entry = match.entry
+  return {
+    "answer": entry.answer,
+    "context": entry.context,
+    "plan": entry.plan,
+    "sub_questions": entry.sub_questions,
+    "faq": {
+      "question": entry.question,
+      "score": match.score,
+      "source": entry.source,
+      "section": entry.section,
+    },
+  }
@@ -2,16 +2,24 @@
 
 from pathlib import Path
 
-from ..core.retrieval import index_documents
+from ..core.chunking import chunk_pdf
+from ..core.retrieval import index_chunks
+from .faq_service import schedule_faq
 
-def index_pdf_file(file_path: Path) -> int:
+def index_pdf_file(file_path: Path, strategy: str | None = None) -> int:
   """Load a PDF from disk and index it into the vector DB.
 
+  With `faq_enabled`, answers to the questions most likely to be asked
+  about the file are then precomputed in the background.
+
   Args:
     file_path: Path to the PDF file on disk.
+    strategy: Optional chunking strategy name (defaults to settings).
 
   Returns:
     Number of document chunks indexed.
   """
 
-  return index_documents(file_path)
+  chunks = index_chunks(chunk_pdf(file_path, strategy))
+  schedule_faq(chunks)
+  return len(chunks)
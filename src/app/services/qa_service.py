@@ -5,29 +5,241 @@ with the multi-agent RAG pipeline without depending directly on LangGraph
 or agent implementation details.
 """
 
-from typing import AsyncGenerator, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import AsyncGenerator, Dict, Any, Iterator, List
 
-from ..core.agents import run_qa_flow, stream_qa_flow
+from ..core.agents import default_thread_id, get_checkpointer, merge_contexts, plan_question, run_qa_flow, stream_qa_flow
+from ..core.config import get_settings
+from ..core.retrieval import RetrievalOptions, retrieve_many, serialize_chunks
+from ..core.sessions import Session, current_session, get_session_store
+from ..core.tracing import profile_request, request_trace, should_profile
+from .faq_service import foreground_request, match_faq
 
-def answer_question(question: str) -> Dict[str, Any]:
+def _session_history(session: Session | None) -> str | None:
+  if session is None:
+    return None
+  return session.history(get_settings().session_history_turns)
+
+@contextmanager
+def _session_scope(session_id: str | None) -> Iterator[Session | None]:
+  """Make the request's session (if any) visible to retrieval for the block."""
+  session = get_session_store().get(session_id) if session_id else None
+  token = current_session.set(session)
+  try:
+    yield session
+  finally:
+    current_session.reset(token)
+
+def resolve_request_id(
+  question: str,
+  retrieval_options: Dict[str, Any] | None = None,
+  request_id: str | None = None,
+  session_id: str | None = None,
+) -> str | None:
+  """Return the id a run will be checkpointed under (None if checkpointing is off).
+
+  Defaults to an id derived from the question, retrieval options and the
+  session's recent turns, matching what the QA graph would derive itself.
+  """
+  if request_id or get_checkpointer() is None:
+    return request_id
+  session = get_session_store().get(session_id) if session_id else None
+  return default_thread_id(question, retrieval_options, _session_history(session))
+
+def answer_question(
+  question: str,
+  retrieval_options: Dict[str, Any] | None = None,
+  request_id: str | None = None,
+  debug: bool = False,
+  profile: bool = False,
+  session_id: str | None = None,
+) -> Dict[str, Any]:
   """Run the multi-agent QA flow for a given question.
 
   Args:
     question: User's natural language question about the vector databases paper.
+    retrieval_options: Optional per-request retrieval overrides
+      (see `RetrievalOptions`).
+    request_id: Optional id of the run; retrying a failed request with the
+      same id resumes it from its last completed step.
+    debug: Attach a timing waterfall of the run under `debug`.
+    profile: Record a sampling profile of the run (requests may also be
+      sampled via `profiling_sample_rate`).
+    session_id: Optional conversation id. Follow-ups see the session's
+      recent turns and reuse its already retrieved chunks that still match.
 
   Returns:
-    Dictionary containing at least `answer` and `context` keys.
+    Dictionary containing at least `answer` and `context` keys, plus the
+    `thread_id` the run was checkpointed under (when checkpointing is enabled).
+    Answers served from the FAQ index carry an `faq` key instead.
   """
-  return run_qa_flow(question)
+  with foreground_request(), _session_scope(session_id) as session, request_trace(debug) as trace, \
+      profile_request(request_id or "qa", should_profile(profile)):
+    history = _session_history(session)
+    # Precomputed answers assume default retrieval and no prior turns
+    result = match_faq(question) if not retrieval_options and history is None else None
+    if result is None:
+      result = run_qa_flow(
+        question,
+        retrieval_options=retrieval_options,
+        thread_id=request_id,
+        history=history,
+      )
+
+  if session is not None:
+    session.add_turn(question, result.get("answer") or "")
+  if trace is not None:
+    result = {**result, "debug": trace.waterfall()}
+  return result
 
-async def stream_answer(question: str) -> AsyncGenerator[str, None]:
-  """Stream the multi-agent QA flow for a given question, yielding tokens.
+def answer_questions_batch(
+  questions: List[str],
+  max_concurrency: int | None = None,
+  retrieval_options: Dict[str, Any] | None = None,
+) -> Iterator[Dict[str, Any]]:
+  """Run the multi-agent QA flow for many questions with shared work.
+
+  The batch is processed in three stages:
+  1. Every question is planned (bounded parallelism).
+  2. Sub-questions from all plans are deduplicated and retrieved together,
+     so each distinct sub-question is embedded and searched only once.
+  3. Summarization and verification run per question (bounded parallelism),
+     re-using the shared retrieval results as pre-filled context.
+
+  Stages 1 and 2 are barriers: no answer is produced until the whole batch
+  has been planned and retrieved, so the first answer line arrives only
+  after the slowest plan plus the shared retrieval. Only planning errors
+  are reported before that.
+
+  Closing the generator (e.g. when the client disconnects) cancels the
+  questions that have not started yet instead of waiting for all of them.
+
+  Args:
+    questions: User questions about the vector databases paper.
+    max_concurrency: Maximum number of pipelines running at once
+      (defaults to `batch_max_concurrency` from settings).
+    retrieval_options: Optional retrieval overrides applied to every question.
+
+  Yields:
+    One result dictionary per question. Answers are yielded in completion
+    order once stage 3 starts. Each result has `index` and `question` keys
+    plus either the QA output (`answer`, `context`, `plan`,
+    `sub_questions`) or an `error` message.
+  """
+  settings = get_settings()
+  workers = max(1, max_concurrency or settings.batch_max_concurrency)
+
+  with foreground_request():
+    plans: Dict[int, Dict[str, Any]] = {}
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+      futures = {
+        executor.submit(plan_question, question): index
+        for index, question in enumerate(questions)
+      }
+      for future in as_completed(futures):
+        index = futures[future]
+        try:
+          plans[index] = future.result()
+        except Exception as exc:
+          yield {"index": index, "question": questions[index], "error": str(exc)}
+    finally:
+      executor.shutdown(wait=False, cancel_futures=True)
+
+    all_sub_questions = [
+      sub_question
+      for index, plan in plans.items()
+      for sub_question in (plan["sub_questions"] or [questions[index]])
+    ]
+    try:
+      docs_by_query = retrieve_many(
+        all_sub_questions,
+        max_workers=workers,
+        options=RetrievalOptions(**(retrieval_options or {})),
+      )
+    except Exception as exc:
+      for index in sorted(plans):
+        yield {"index": index, "question": questions[index], "error": str(exc)}
+      return
+
+    def _answer(index: int) -> Dict[str, Any]:
+      plan = plans[index]
+      sub_questions = plan["sub_questions"] or [questions[index]]
+      context = merge_contexts(
+        [
+          serialize_chunks([doc for doc, _score in docs_by_query[query]])
+          for query in sub_questions
+        ]
+      )
+      return run_qa_flow(
+        questions[index],
+        plan=plan["plan"],
+        sub_questions=sub_questions,
+        context=context,
+        retrieval_options=retrieval_options,
+      )
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+      futures = {executor.submit(_answer, index): index for index in plans}
+      for future in as_completed(futures):
+        index = futures[future]
+        try:
+          result = future.result()
+        except Exception as exc:
+          yield {"index": index, "question": questions[index], "error": str(exc)}
+          continue
+
+        yield {
+          "index": index,
+          "question": questions[index],
+          "answer": result.get("answer", ""),
+          "context": result.get("context", ""),
+          "plan": result.get("plan"),
+          "sub_questions": result.get("sub_questions"),
+          "request_id": result.get("thread_id"),
+        }
+    finally:
+      # Questions not started yet are dropped when the client goes away
+      executor.shutdown(wait=False, cancel_futures=True)
+
+async def stream_answer(
+  question: str,
+  retrieval_options: Dict[str, Any] | None = None,
+  request_id: str | None = None,
+  debug: bool = False,
+  profile: bool = False,
+  session_id: str | None = None,
+) -> AsyncGenerator[Dict[str, Any], None]:
+  """Stream the multi-agent QA flow for a given question, yielding events.
 
   Args:
     question: User's natural language question about the vector databases paper.
+    retrieval_options: Optional per-request retrieval overrides.
+    request_id: Optional id of the run, used to resume a failed stream.
+    debug: Finish with a `debug` event carrying the run's timing waterfall.
+    profile: Record a sampling profile of the run.
+    session_id: Optional conversation id (see `answer_question`).
 
   Yields:
-    String tokens from the verification agent's output.
+    Event dictionaries (`plan`, `context`, `reasoning`, `token`) in the order
+    the pipeline produces them.
   """
-  async for token in stream_qa_flow(question):
-    yield token
+  answer_parts: List[str] = []
+  with foreground_request(), _session_scope(session_id) as session, request_trace(debug) as trace:
+    async for event in stream_qa_flow(
+      question,
+      retrieval_options=retrieval_options,
+      thread_id=request_id,
+      profile=should_profile(profile),
+      history=_session_history(session),
+    ):
+      if event["event"] == "token":
+        answer_parts.append(event["content"])
+      yield event
+
+  if session is not None:
+    session.add_turn(question, "".join(answer_parts))
+  if trace is not None:
+    yield {"event": "debug", **trace.waterfall()}
@@ -0,0 +1,8 @@
+"""Settings the app needs at import time; no test reaches OpenAI or Pinecone."""
+
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("PINECONE_API_KEY", "test")
+os.environ.setdefault("PINECONE_INDEX_NAME", "test")
+os.environ.setdefault("LLM_CACHE_MODE", "off")
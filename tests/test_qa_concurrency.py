@@ -0,0 +1,85 @@
+"""Concurrent identical requests on a checkpointed thread.
+
+The graph nodes are replaced with fakes, so no OpenAI or Pinecone calls are
+made; only the checkpointing and the endpoints' threading are exercised.
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.app.api import app
+from src.app.core import config
+from src.app.core.agents import checkpoint, graph
+
+QUESTION = "What is a vector database?"
+
+# Long enough for the second request to arrive while the first holds the thread
+RETRIEVAL_SECONDS = 1.0
+
+
+def _planning(state):
+  return {"plan": "look it up", "sub_questions": [state["question"]]}
+
+
+def _retrieval(state):
+  time.sleep(RETRIEVAL_SECONDS)
+  return {"context": "Chunk 1: vectors"}
+
+
+def _summarization(state):
+  return {"draft_answer": "draft"}
+
+
+def _verification(state):
+  return {"answer": "final answer"}
+
+
+@pytest.fixture(autouse=True)
+def fake_graph(monkeypatch, tmp_path):
+  monkeypatch.setenv("CHECKPOINT_PATH", str(tmp_path / "checkpoints.sqlite"))
+  # A /qa request blocking the event loop would only get through once the
+  # stream's claim goes stale, so keep that well above the expected run time
+  monkeypatch.setenv("CHECKPOINT_STALE_RUN_SECONDS", "20")
+  monkeypatch.setattr(config, "_settings", None)
+  monkeypatch.setattr(graph, "planning_node", _planning)
+  monkeypatch.setattr(graph, "retrieval_node", _retrieval)
+  monkeypatch.setattr(graph, "summarization_node", _summarization)
+  monkeypatch.setattr(graph, "verification_node", _verification)
+  for cached in (graph.get_qa_graph, checkpoint.get_checkpointer, checkpoint.get_thread_registry):
+    cached.cache_clear()
+  yield
+  for cached in (graph.get_qa_graph, checkpoint.get_checkpointer, checkpoint.get_thread_registry):
+    cached.cache_clear()
+
+
+def test_identical_qa_waits_for_in_flight_stream_without_blocking_the_loop():
+  async def scenario():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+      started = time.monotonic()
+      stream = asyncio.create_task(client.post("/qa/stream", json={"question": QUESTION}))
+      # Let the stream claim the thread before the identical request arrives
+      await asyncio.sleep(RETRIEVAL_SECONDS / 4)
+      qa = asyncio.create_task(client.post("/qa", json={"question": QUESTION}))
+      await asyncio.sleep(RETRIEVAL_SECONDS / 4)
+
+      # Unrelated requests are still served while /qa waits
+      metrics = await client.get("/metrics/sessions")
+      assert metrics.status_code == 200
+      assert not qa.done()
+
+      stream_response, qa_response = await asyncio.gather(stream, qa)
+      return time.monotonic() - started, stream_response, qa_response
+
+  elapsed, stream_response, qa_response = asyncio.run(scenario())
+
+  assert elapsed < 10
+  assert stream_response.status_code == 200
+  assert "event: done" in stream_response.text
+  assert qa_response.status_code == 200
+  body = qa_response.json()
+  assert body["answer"] == "final answer"
+  assert body["request_id"] == checkpoint.default_thread_id(QUESTION)
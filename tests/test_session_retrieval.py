@@ -0,0 +1,94 @@
+"""Session chunks are ranked together with the index results."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.app.core import config
+from src.app.core.retrieval import RetrievalOptions, get_retrieval_cache, retrieve, vector_store
+from src.app.core.sessions import Session, current_session
+
+# Two topics of the same paper in a toy embedding space. Their chunks are
+# similar enough (cosine ~0.6) to pass `session_match_threshold`.
+HNSW = np.array([1.0, 0.0, 0.0, 0.0])
+PQ = np.array([0.6, 0.8, 0.0, 0.0])
+
+INDEX = {
+  "hnsw-1": (HNSW + [0, 0, 0.1, 0], "HNSW builds a layered proximity graph."),
+  "hnsw-2": (HNSW + [0, 0, 0, 0.1], "HNSW search starts at the top layer."),
+  "pq-1": (PQ + [0, 0, 0.1, 0], "Product quantization splits vectors into sub-vectors."),
+  "pq-2": (PQ + [0, 0, 0, 0.1], "PQ codebooks are learned with k-means."),
+}
+
+QUERIES = {"How does HNSW work?": HNSW, "What is product quantization?": PQ}
+
+
+def _unit(vector):
+  return vector / np.linalg.norm(vector)
+
+
+def _query_index(vector, top_k, include_values, namespace=None):
+  matches = [
+    SimpleNamespace(
+      id=chunk,
+      score=float(_unit(values) @ _unit(np.asarray(vector))),
+      metadata={"text": text, "source": "paper.pdf", "page": 1},
+      values=values.tolist() if include_values else None,
+    )
+    for chunk, (values, text) in INDEX.items()
+  ]
+  matches.sort(key=lambda match: match.score, reverse=True)
+  return matches[:top_k]
+
+
+@pytest.fixture(autouse=True)
+def fake_index(monkeypatch):
+  monkeypatch.setattr(config, "_settings", None)
+  monkeypatch.setattr(vector_store, "_query_index", _query_index)
+  monkeypatch.setattr(vector_store, "_embed", lambda queries: [QUERIES[query].tolist() for query in queries])
+  get_retrieval_cache().bump_corpus_version()
+
+
+def _ask(session, question):
+  token = current_session.set(session)
+  try:
+    return [doc.id for doc, _score in retrieve(question, options=RetrievalOptions(k=2, fetch_k=4))]
+  finally:
+    current_session.reset(token)
+
+
+def test_follow_up_on_a_new_topic_is_answered_from_the_index():
+  session = Session("s", max_chunks=16, max_turns=4)
+  assert sorted(_ask(session, "How does HNSW work?")) == ["hnsw-1", "hnsw-2"]
+  assert len(session) == 2
+
+  assert sorted(_ask(session, "What is product quantization?")) == ["pq-1", "pq-2"]
+  assert len(session) == 4
+
+
+def test_session_chunks_are_seeded_from_cache_hits():
+  _ask(None, "How does HNSW work?")
+  session = Session("s", max_chunks=16, max_turns=4)
+  assert sorted(_ask(session, "How does HNSW work?")) == ["hnsw-1", "hnsw-2"]
+  assert len(session) == 2
+
+
+def test_embeddings_are_only_fetched_when_used(monkeypatch):
+  requested = []
+
+  def _recording_query_index(vector, top_k, include_values, namespace=None):
+    requested.append(include_values)
+    return _query_index(vector, top_k, include_values, namespace)
+
+  monkeypatch.setattr(vector_store, "_query_index", _recording_query_index)
+  no_rerank = RetrievalOptions(k=2, fetch_k=2)
+
+  retrieve("How does HNSW work?", options=no_rerank)
+  token = current_session.set(Session("s", max_chunks=16, max_turns=4))
+  try:
+    retrieve("What is product quantization?", options=no_rerank)
+  finally:
+    current_session.reset(token)
+
+  assert requested == [False, True]